@@ -1,5 +1,28 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from .auth import invalidate_user
+        from .db import configure_sqlite
+
+        connection_created.connect(
+            configure_sqlite, dispatch_uid='core.configure_sqlite'
+        )
+        user_model = get_user_model()
+        post_save.connect(
+            invalidate_user, sender=user_model,
+            dispatch_uid='core.invalidate_user_save',
+        )
+        post_delete.connect(
+            invalidate_user, sender=user_model,
+            dispatch_uid='core.invalidate_user_delete',
+        )
+        autodiscover_modules('tasks')
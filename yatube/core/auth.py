@@ -0,0 +1,51 @@
+"""Кэширование пользователя, загружаемого AuthenticationMiddleware.
+
+Снимок пользователя хранится вместе с версией, при которой он был
+прочитан. Сохранение или удаление пользователя (в том числе смена
+пароля и last_login) меняет версию, поэтому устаревший снимок больше
+не подходит, даже если его успел записать параллельный запрос. Версия
+и снимок читаются одним get_many из общего кэша CACHES['shared'],
+поэтому сброс виден всем процессам сразу.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def version_key(user_id):
+    return f'auth:user_version:{user_id}'
+
+
+def user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def new_version():
+    return time.time_ns()
+
+
+def invalidate_user(sender, instance, **kwargs):
+    caches['shared'].set(version_key(instance.pk), new_version(), None)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        cache = caches['shared']
+        keys = version_key(user_id), user_key(user_id)
+        cached = cache.get_many(keys)
+        version = cached.get(keys[0])
+        snapshot = cached.get(keys[1])
+        if version is None:
+            version = new_version()
+            if not cache.add(keys[0], version, None):
+                version = cache.get(keys[0], version)
+        elif snapshot is not None and snapshot[0] == version:
+            return snapshot[1]
+        user = super().get_user(user_id)
+        if user is not None:
+            cache.set(
+                keys[1], (version, user), settings.AUTH_USER_CACHE_TIMEOUT
+            )
+        return user
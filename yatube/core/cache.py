@@ -0,0 +1,48 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import MemcachedCache
+
+from .metrics import registry
+
+MISSING = object()
+FRAGMENT_PREFIX = 'template.cache.'
+
+
+def cache_label(key):
+    """Имя кэша для метрик: фрагмент шаблона или префикс ключа."""
+    if key.startswith(FRAGMENT_PREFIX):
+        return key[len(FRAGMENT_PREFIX):].split('.', 1)[0]
+    return key.split(':', 1)[0]
+
+
+class InstrumentedCacheMixin:
+    """Считает попадания и промахи кэша.
+
+    Подмешивается перед любым бэкендом кэша Django, например
+    class Cache(InstrumentedCacheMixin, MemcachedCache).
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version=version)
+        self.count(key, value is not MISSING)
+        return default if value is MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        for key in keys:
+            self.count(key, key in found)
+        return found
+
+    def count(self, key, hit):
+        registry.inc('yatube_cache_requests_total', {
+            'cache': cache_label(str(key)),
+            'result': 'hit' if hit else 'miss',
+        })
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedMemcachedCache(InstrumentedCacheMixin, MemcachedCache):
+    pass
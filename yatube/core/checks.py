@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """CACHES['shared'] должен быть общим для всех процессов."""
+    backend = settings.CACHES['shared']['BACKEND']
+    if 'memcached' in backend.lower():
+        return []
+    return [Error(
+        "CACHES['shared'] хранится в памяти процесса",
+        hint='Задайте MEMCACHED_LOCATION: сессии и снимки пользователей '
+             'должны быть общими для веб-процессов.',
+        id='core.E001',
+    )]
@@ -0,0 +1,146 @@
+"""Счётчики в памяти процесса со сбросом в базу пачками.
+
+Инкремент меняет словарь в памяти процесса и не трогает ни базу, ни
+кэш. Накопленные приросты пишет в базу функция write счётчика одним
+UPDATE на пачку: после <PREFIX>_FLUSH_EVERY приростов, через
+<PREFIX>_FLUSH_INTERVAL секунд после первого несброшенного прироста
+(проверяется при инкременте и после каждого запроса в
+CounterFlushMiddleware) и при остановке процесса через flush_all().
+pending() видит только приросты своего процесса, поэтому другие
+процессы показывают новое значение с задержкой до интервала сброса.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+logger = logging.getLogger('yatube.tasks')
+counters = []
+
+# Параметров в одном UPDATE: два на When и один на IN.
+UPDATE_BATCH_SIZE = 300
+
+
+class BufferedCounter:
+    def __init__(self, name, write, settings_prefix):
+        self.name = name
+        self.write = write
+        self.settings_prefix = settings_prefix
+        self.lock = threading.Lock()
+        self.deltas = {}
+        self.increments = 0
+        self.first_at = None
+        counters.append(self)
+
+    def setting(self, name):
+        return getattr(settings, f'{self.settings_prefix}_FLUSH_{name}')
+
+    def incr(self, pk, delta=1):
+        with self.lock:
+            self.deltas[pk] = self.deltas.get(pk, 0) + delta
+            self.increments += 1
+            if self.first_at is None:
+                self.first_at = time.monotonic()
+        self.maybe_flush()
+
+    def pending(self, pks):
+        """Несброшенные приросты этого процесса для pks."""
+        with self.lock:
+            return {
+                pk: self.deltas[pk] for pk in pks if self.deltas.get(pk)
+            }
+
+    def due(self):
+        first_at = self.first_at
+        if first_at is None:
+            return False
+        return (
+            self.increments >= self.setting('EVERY')
+            or time.monotonic() - first_at >= self.setting('INTERVAL')
+        )
+
+    def drain(self):
+        """Забирает накопленные приросты: {id: прирост}."""
+        with self.lock:
+            deltas = {pk: delta for pk, delta in self.deltas.items() if delta}
+            self.deltas = {}
+            self.increments = 0
+            self.first_at = None
+        return deltas
+
+    def restore(self, deltas):
+        """Возвращает приросты в буфер; повтор — через интервал сброса."""
+        with self.lock:
+            for pk, delta in deltas.items():
+                self.deltas[pk] = self.deltas.get(pk, 0) + delta
+            if self.first_at is None:
+                self.first_at = time.monotonic()
+
+    @contextmanager
+    def draining(self):
+        """Забирает приросты; если блок упал, они возвращаются в буфер."""
+        deltas = self.drain()
+        try:
+            yield deltas
+        except Exception:
+            self.restore(deltas)
+            raise
+
+    def flush(self):
+        """Пишет накопленные приросты в базу, возвращает число id."""
+        with self.draining() as deltas:
+            if deltas:
+                self.write(deltas)
+        return len(deltas)
+
+    def maybe_flush(self):
+        if not self.due():
+            return
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Не удалось сбросить счётчик %s', self.name)
+
+
+def maybe_flush_all():
+    for counter in counters:
+        counter.maybe_flush()
+
+
+def drain_all():
+    """Отбрасывает несброшенные приросты всех счётчиков процесса."""
+    for counter in counters:
+        counter.drain()
+
+
+def flush_all():
+    """Сбрасывает все счётчики процесса, вызывается при остановке."""
+    for counter in counters:
+        try:
+            counter.flush()
+        except Exception:
+            logger.exception('Не удалось сбросить счётчик %s', counter.name)
+
+
+def bulk_increment(queryset, field, deltas, output_field=None,
+                   minimum=None):
+    """Прибавляет deltas {pk: прирост} к полю field пачками UPDATE.
+
+    Если задан minimum, значение не опускается ниже него.
+    """
+    output_field = output_field or IntegerField()
+    items = list(deltas.items())
+    for start in range(0, len(items), UPDATE_BATCH_SIZE):
+        batch = dict(items[start:start + UPDATE_BATCH_SIZE])
+        value = F(field) + Case(
+            *(When(pk=pk, then=Value(delta)) for pk, delta in batch.items()),
+            default=Value(0),
+            output_field=output_field,
+        )
+        if minimum is not None:
+            value = Greatest(value, Value(minimum))
+        queryset.filter(pk__in=batch).update(**{field: value})
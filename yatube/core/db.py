@@ -0,0 +1,67 @@
+import re
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+PRAGMA_VALUE_RE = re.compile(r'^-?\w+$')
+
+
+class QueryCounter:
+    """Обёртка для connection.execute_wrapper: считает запросы и их время.
+
+    При record=True дополнительно сохраняет текст, параметры и время
+    каждого запроса в self.queries.
+    """
+
+    def __init__(self, record=False):
+        self.record = record
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            if self.record:
+                self.queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'params': params,
+                    'many': many,
+                    'duration': duration,
+                })
+
+
+@contextmanager
+def wrap_all_connections(wrapper):
+    """connection.execute_wrapper сразу для всех баз из DATABASES."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield wrapper
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    """Выполняет PRAGMA из словаря {имя: значение} на курсоре SQLite."""
+    for name, value in pragmas.items():
+        value = str(value)
+        if not PRAGMA_VALUE_RE.match(name) or not PRAGMA_VALUE_RE.match(value):
+            raise ValueError(f'Недопустимая PRAGMA {name}={value}')
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик connection_created: настраивает новое соединение SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if pragmas:
+        with connection.cursor() as cursor:
+            apply_sqlite_pragmas(cursor, pragmas)
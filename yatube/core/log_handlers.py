@@ -0,0 +1,13 @@
+import os
+from logging.handlers import RotatingFileHandler
+
+
+class DirectoryRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler, создающий каталог лога при открытии файла.
+
+    С delay=True каталог появляется только при первой записи.
+    """
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
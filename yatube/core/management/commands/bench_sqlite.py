@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import apply_sqlite_pragmas
+
+SCHEMA = (
+    'CREATE TABLE comment ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+    ' post_id INTEGER NOT NULL,'
+    ' author_id INTEGER NOT NULL,'
+    ' text TEXT NOT NULL,'
+    ' created REAL NOT NULL)',
+    'CREATE INDEX comment_post ON comment (post_id, created)',
+)
+READ_SQL = (
+    'SELECT id, author_id, text FROM comment '
+    'WHERE post_id = ? ORDER BY created DESC LIMIT 10'
+)
+WRITE_SQL = (
+    'INSERT INTO comment (post_id, author_id, text, created) '
+    'VALUES (?, ?, ?, ?)'
+)
+
+
+def prepare(path, rows, posts):
+    connection = sqlite3.connect(path)
+    for statement in SCHEMA:
+        connection.execute(statement)
+    connection.executemany(WRITE_SQL, (
+        (number % posts, number % 97, 'комментарий ' * 10, time.time())
+        for number in range(rows)
+    ))
+    connection.commit()
+    connection.close()
+
+
+def worker(path, pragmas, write, stop, posts, totals, lock):
+    # Как и Django, ходим в базу из каждого потока своим соединением.
+    connection = sqlite3.connect(path, isolation_level=None)
+    if pragmas:
+        apply_sqlite_pragmas(connection.cursor(), pragmas)
+    done = errors = 0
+    number = 0
+    while not stop.is_set():
+        number += 1
+        try:
+            if write:
+                connection.execute('BEGIN')
+                connection.execute(WRITE_SQL, (
+                    number % posts, number % 97, 'новый комментарий',
+                    time.time(),
+                ))
+                connection.execute('COMMIT')
+            else:
+                connection.execute(READ_SQL, (number % posts,)).fetchall()
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+    connection.close()
+    kind = 'writes' if write else 'reads'
+    with lock:
+        totals[kind] += done
+        totals[f'{kind}_errors'] += errors
+
+
+def run(path, pragmas, readers, writers, duration, posts):
+    totals = {'reads': 0, 'writes': 0, 'reads_errors': 0, 'writes_errors': 0}
+    stop = threading.Event()
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(path, pragmas, write, stop, posts, totals, lock),
+        )
+        for write in [False] * readers + [True] * writers
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        key: round(value / duration, 1) if key in ('reads', 'writes')
+        else value
+        for key, value in totals.items()
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite на конкурентных чтениях '
+        'и записях без настроек и с SQLITE_PRAGMAS из settings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument('--rows', type=int, default=50000)
+        parser.add_argument('--posts', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        variants = (
+            ('stock', {}),
+            ('tuned', settings.SQLITE_PRAGMAS),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas in variants:
+                path = os.path.join(directory, f'{name}.sqlite3')
+                prepare(path, options['rows'], options['posts'])
+                result = run(
+                    path, pragmas, options['readers'], options['writers'],
+                    options['duration'], options['posts'],
+                )
+                self.stdout.write(
+                    f'{name:<6} чтений/с={result["reads"]:>10} '
+                    f'записей/с={result["writes"]:>8} '
+                    f'ошибок чтения={result["reads_errors"]} '
+                    f'ошибок записи={result["writes_errors"]}'
+                )
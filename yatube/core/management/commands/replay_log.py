@@ -0,0 +1,339 @@
+import hashlib
+import io
+import json
+import re
+import string
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from importlib import import_module
+from urllib.parse import unquote_to_bytes, urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY
+from django.contrib.auth import SESSION_KEY
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import Resolver404, resolve
+from django.utils.crypto import get_random_string
+
+from core.stats import histogram, percentile
+from posts.models import User
+from posts.seed import SEED_PREFIX, seed_dataset
+
+COMBINED_LOG_RE = re.compile(
+    r'(?P<ip>\S+) \S+ (?P<user>\S+) \[(?P<time>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" (?P<status>\d{3}) \S+'
+    r'(?: "[^"]*" "(?P<agent>[^"]*)")?'
+)
+COMBINED_TIME_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+CSRF_CHARS = string.ascii_letters + string.digits
+DEFAULT_FORM = {'text': 'Запись из воспроизведённого лога'}
+
+
+def parse_combined(line):
+    match = COMBINED_LOG_RE.match(line)
+    if match is None:
+        return None
+    user = match.group('user')
+    return {
+        'ts': datetime.strptime(
+            match.group('time'), COMBINED_TIME_FORMAT
+        ).timestamp(),
+        'method': match.group('method'),
+        'path': match.group('path'),
+        'session': (
+            user if user != '-'
+            else f'{match.group("ip")} {match.group("agent") or ""}'
+        ),
+        'anonymous': None,
+        'data': None,
+    }
+
+
+def parse_jsonl(line):
+    record = json.loads(line)
+    ts = record.get('ts', 0)
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts).timestamp()
+    return {
+        'ts': float(ts),
+        'method': record.get('method', 'GET').upper(),
+        'path': record['path'],
+        'session': str(record.get('session', record.get('ip', ''))),
+        'anonymous': record.get('anonymous'),
+        'data': record.get('data'),
+    }
+
+
+def read_entries(path, log_format='auto'):
+    """Читает лог и возвращает записи, отсортированные по времени."""
+    entries = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            line_format = log_format
+            if line_format == 'auto':
+                line_format = 'jsonl' if line.startswith('{') else 'combined'
+            entry = (
+                parse_jsonl(line) if line_format == 'jsonl'
+                else parse_combined(line)
+            )
+            if entry is not None:
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry['ts'])
+    return entries
+
+
+def stable_hash(value):
+    return int(hashlib.md5(value.encode()).hexdigest(), 16)
+
+
+class SessionPool:
+    """Сопоставляет сессии из лога с сидированными пользователями."""
+
+    def __init__(self, users, anonymous_ratio):
+        self.users = users
+        self.anonymous_ratio = anonymous_ratio
+        self.cookies = {}
+        self.lock = threading.Lock()
+        self.store = import_module(settings.SESSION_ENGINE).SessionStore
+
+    def login(self, user):
+        session = self.store()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session.session_key
+
+    def cookie_for(self, entry):
+        key = entry['session']
+        with self.lock:
+            if key not in self.cookies:
+                self.cookies[key] = self.make_cookie(entry)
+            return self.cookies[key]
+
+    def make_cookie(self, entry):
+        csrf_token = get_random_string(64, CSRF_CHARS)
+        cookie = {settings.CSRF_COOKIE_NAME: csrf_token}
+        digest = stable_hash(entry['session'])
+        anonymous = entry['anonymous']
+        if anonymous is None:
+            anonymous = digest % 1000 < self.anonymous_ratio * 1000
+        if not anonymous:
+            user = self.users[digest % len(self.users)]
+            cookie[settings.SESSION_COOKIE_NAME] = self.login(user)
+        return cookie
+
+
+def build_environ(entry, cookie):
+    parts = urlsplit(entry['path'])
+    body = b''
+    if entry['method'] not in ('GET', 'HEAD'):
+        body = urlencode(entry['data'] or DEFAULT_FORM).encode()
+    return {
+        'REQUEST_METHOD': entry['method'],
+        'SCRIPT_NAME': '',
+        'PATH_INFO': unquote_to_bytes(parts.path).decode('iso-8859-1'),
+        'QUERY_STRING': parts.query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '198.51.100.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_COOKIE': '; '.join(
+            f'{name}={value}' for name, value in cookie.items()
+        ),
+        'HTTP_X_CSRFTOKEN': cookie[settings.CSRF_COOKIE_NAME],
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def url_name(path):
+    try:
+        return resolve(urlsplit(path).path).view_name
+    except Resolver404:
+        return 'unresolved'
+
+
+def replay_one(application, entry, cookie):
+    """Прогоняет одну запись через WSGI-приложение."""
+    status = []
+
+    def start_response(response_status, headers, exc_info=None):
+        status.append(int(response_status.split()[0]))
+
+    start = time.perf_counter()
+    error = None
+    size = 0
+    try:
+        response = application(build_environ(entry, cookie), start_response)
+        try:
+            for chunk in response:
+                size += len(chunk)
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+    except Exception as exc:
+        error = f'{type(exc).__name__}: {exc}'
+    return {
+        'name': url_name(entry['path']),
+        'latency_ms': (time.perf_counter() - start) * 1000,
+        'status': status[0] if status else None,
+        'bytes': size,
+        'error': error,
+    }
+
+
+def replay(application, entries, sessions, workers=4, speed=None):
+    """Воспроизводит записи из пула потоков.
+
+    Если speed задан, сохраняются исходные интервалы между запросами,
+    ускоренные в speed раз; иначе запросы отправляются без пауз.
+    """
+    futures = []
+    started = time.perf_counter()
+    first_ts = entries[0]['ts'] if entries else 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for entry in entries:
+            if speed:
+                due = started + (entry['ts'] - first_ts) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(pool.submit(
+                replay_one, application, entry, sessions.cookie_for(entry)
+            ))
+        results = [future.result() for future in futures]
+    return results, time.perf_counter() - started
+
+
+def summarize(results, duration):
+    by_name = defaultdict(list)
+    for result in results:
+        by_name[result['name']].append(result)
+    summary = {
+        'requests': len(results),
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(results) / duration, 2) if duration else 0,
+        'errors': sum(1 for result in results if is_error(result)),
+        'urls': {},
+    }
+    for name, items in sorted(by_name.items()):
+        latencies = [item['latency_ms'] for item in items]
+        summary['urls'][name] = {
+            'count': len(items),
+            'errors': sum(1 for item in items if is_error(item)),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'histogram_ms': histogram(latencies),
+            'statuses': dict(sorted(
+                count_statuses(items).items(), key=lambda item: str(item[0])
+            )),
+        }
+    summary['error_samples'] = [
+        result['error'] or f'{result["name"]}: HTTP {result["status"]}'
+        for result in results if is_error(result)
+    ][:20]
+    return summary
+
+
+def is_error(result):
+    return result['error'] is not None or (result['status'] or 500) >= 500
+
+
+def count_statuses(items):
+    counts = defaultdict(int)
+    for item in items:
+        counts[item['status']] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Воспроизводит access-лог (combined или JSONL) через '
+        'WSGI-обработчик Django без запуска сервера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', help='Путь к файлу лога.')
+        parser.add_argument(
+            '--format', choices=('auto', 'combined', 'jsonl'),
+            default='auto'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--speed', type=float, default=None,
+            help='Сохранять интервалы между запросами, ускорив их в '
+                 'указанное число раз. По умолчанию запросы идут без пауз.'
+        )
+        parser.add_argument(
+            '--anonymous-ratio', type=float, default=0.5,
+            help='Доля сессий без явной пометки, которые останутся '
+                 'анонимными.'
+        )
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Создать пользователей и посты, если их ещё нет.'
+        )
+        parser.add_argument('--output', help='Записать отчёт в JSON.')
+
+    def handle(self, *args, **options):
+        # Свой обработчик, а не yatube.wsgi: тот настраивает процесс
+        # воркера, например сброс буферов при выходе.
+        application = WSGIHandler()
+
+        entries = read_entries(options['log'], options['format'])
+        if not entries:
+            raise CommandError('В логе не найдено ни одного запроса.')
+        users = list(User.objects.filter(
+            username__startswith=f'{SEED_PREFIX}_user_'
+        ).order_by('pk'))
+        if not users and options['seed']:
+            users = seed_dataset()['users']
+        if not users:
+            raise CommandError(
+                'Нет сидированных пользователей, запустите с --seed.'
+            )
+        sessions = SessionPool(users, options['anonymous_ratio'])
+        with override_settings(DEBUG=False):
+            results, duration = replay(
+                application, entries, sessions,
+                workers=options['workers'], speed=options['speed'],
+            )
+        summary = summarize(results, duration)
+        self.stdout.write(
+            f'Запросов: {summary["requests"]}, '
+            f'за {summary["duration_s"]} c, '
+            f'{summary["throughput_rps"]} rps, '
+            f'ошибок: {summary["errors"]}'
+        )
+        for name, stats in summary['urls'].items():
+            self.stdout.write(
+                f'{name:<28} n={stats["count"]:<6} '
+                f'p50={stats["p50_ms"]:>8.2f}ms '
+                f'p95={stats["p95_ms"]:>8.2f}ms '
+                f'p99={stats["p99_ms"]:>8.2f}ms '
+                f'errors={stats["errors"]}'
+            )
+        for sample in summary['error_samples']:
+            self.stderr.write(sample)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(summary, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,62 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import tasks
+
+
+def execute_in_thread(task_obj):
+    close_old_connections()
+    try:
+        return tasks.execute(task_obj)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.Task.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза между опросами пустой очереди, секунды.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+        parser.add_argument(
+            '--no-periodic', action='store_true',
+            help='Не ставить периодические задачи из TASKS_PERIODIC.'
+        )
+
+    def handle(self, *args, **options):
+        scheduler = None if options['no_periodic'] else (
+            tasks.PeriodicScheduler()
+        )
+        concurrency = options['concurrency']
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                if scheduler is not None:
+                    scheduler.tick()
+                batch = tasks.claim(concurrency)
+                if concurrency == 1:
+                    for task_obj in batch:
+                        tasks.execute(task_obj)
+                else:
+                    wait([
+                        pool.submit(execute_in_thread, task_obj)
+                        for task_obj in batch
+                    ])
+                for task_obj in batch:
+                    self.stdout.write(
+                        f'{task_obj.name} #{task_obj.pk}: {task_obj.status}'
+                    )
+                if options['once'] and not batch:
+                    break
+                if not batch:
+                    close_old_connections()
+                    time.sleep(options['poll_interval'])
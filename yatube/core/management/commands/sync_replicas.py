@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.routers import sync_replica
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в файлы реплик для чтения.'
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены: DATABASE_REPLICAS пуст.')
+        for alias in settings.DATABASE_REPLICAS:
+            sync_replica(alias)
+            self.stdout.write(f'{alias} обновлена')
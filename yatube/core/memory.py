@@ -0,0 +1,65 @@
+"""Учёт памяти и крупных выборок в рамках одного запроса.
+
+Число строк запроса считается по созданным моделям: экземпляры,
+созданные после очередного запроса к БД, относятся к нему. Запросы
+через values() и raw-курсоры этим способом не учитываются.
+"""
+import threading
+from collections import Counter
+
+from django.db.models.signals import post_init
+
+_state = threading.local()
+
+
+class RequestMemoryTracker:
+    def __init__(self):
+        self.queries = []
+        self.models = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, Counter()))
+        return execute(sql, params, many, context)
+
+    def instance_created(self, label):
+        self.models[label] += 1
+        if self.queries:
+            self.queries[-1][1][label] += 1
+
+    def large_queries(self, max_rows):
+        """Запросы, породившие больше max_rows объектов одной модели."""
+        found = []
+        for sql, models in self.queries:
+            if not models:
+                continue
+            label, rows = models.most_common(1)[0]
+            if rows > max_rows:
+                found.append({'sql': sql, 'model': label, 'rows': rows})
+        return found
+
+    def bursts(self, max_instances):
+        return {
+            label: count for label, count in self.models.items()
+            if count > max_instances
+        }
+
+
+def track_instance(sender, instance, **kwargs):
+    tracker = getattr(_state, 'tracker', None)
+    if tracker is not None:
+        tracker.instance_created(sender._meta.label)
+
+
+def connect():
+    post_init.connect(track_instance, dispatch_uid='core.memory')
+
+
+def start():
+    _state.tracker = RequestMemoryTracker()
+    return _state.tracker
+
+
+def stop():
+    tracker = getattr(_state, 'tracker', None)
+    _state.tracker = None
+    return tracker
@@ -0,0 +1,181 @@
+"""Счётчики и гистограммы в формате Prometheus.
+
+Каждый процесс копит метрики в памяти и периодически сбрасывает их
+в свой файл в settings.METRICS_DIR. Эндпоинт /metrics складывает
+данные текущего процесса с файлами остальных воркеров.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+FILE_PREFIX = 'metrics_'
+
+
+def label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = time.monotonic()
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None, buckets=DURATION_BUCKETS):
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': list(buckets),
+                    'counts': [0] * (len(buckets) + 1),
+                    'sum': 0.0,
+                }
+            histogram['counts'][bisect.bisect_left(buckets, value)] += 1
+            histogram['sum'] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [
+                    [name, dict(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, dict(labels), {
+                        'buckets': histogram['buckets'],
+                        'counts': list(histogram['counts']),
+                        'sum': histogram['sum'],
+                    }]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def maybe_flush(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        if time.monotonic() - self.last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        """Атомарно записывает снимок метрик в файл текущего процесса."""
+        self.last_flush = time.monotonic()
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = process_file(directory, os.getpid())
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(tmp_path, path)
+
+
+registry = Registry()
+
+
+def process_file(directory, pid):
+    return os.path.join(directory, f'{FILE_PREFIX}{pid}.json')
+
+
+def load_snapshots():
+    """Снимки всех процессов: свой из памяти, чужие из файлов."""
+    snapshots = [registry.snapshot()]
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        return snapshots
+    own_file = process_file(directory, os.getpid())
+    for path in glob.glob(os.path.join(directory, f'{FILE_PREFIX}*.json')):
+        if path == own_file:
+            continue
+        try:
+            with open(path, encoding='utf-8') as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def aggregate(snapshots):
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, label_key(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, data in snapshot['histograms']:
+            key = (name, label_key(labels))
+            merged = histograms.get(key)
+            if merged is None or merged['buckets'] != data['buckets']:
+                histograms[key] = {
+                    'buckets': data['buckets'],
+                    'counts': list(data['counts']),
+                    'sum': data['sum'],
+                }
+                continue
+            merged['counts'] = [
+                left + right
+                for left, right in zip(merged['counts'], data['counts'])
+            ]
+            merged['sum'] += data['sum']
+    return counters, histograms
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('\n', '\\n')
+        .replace('"', '\\"')
+    )
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{escape(value)}"' for name, value in labels)
+    return '{' + pairs + '}'
+
+
+def render():
+    """Текст для /metrics в формате Prometheus exposition 0.0.4."""
+    counters, histograms = aggregate(load_snapshots())
+    lines = []
+    typed = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name}{format_labels(labels)} {value}')
+    for (name, labels), data in sorted(histograms.items()):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f'# TYPE {name} histogram')
+        cumulative = 0
+        bounds = [str(bucket) for bucket in data['buckets']] + ['+Inf']
+        for bound, count in zip(bounds, data['counts']):
+            cumulative += count
+            bucket_labels = labels + (('le', bound),)
+            lines.append(
+                f'{name}_bucket{format_labels(bucket_labels)} {cumulative}'
+            )
+        lines.append(f'{name}_sum{format_labels(labels)} {data["sum"]}')
+        lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,323 @@
+import json
+import logging
+import random
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import counters, memory, routers, sampling, template_profiling
+from .db import QueryCounter, wrap_all_connections
+from .metrics import COUNT_BUCKETS, registry
+
+template_logger = logging.getLogger('yatube.templates')
+memory_logger = logging.getLogger('yatube.memory')
+slow_logger = logging.getLogger('yatube.slow_requests')
+MEMORY_BUCKETS = tuple(2 ** power * 1024 * 1024 for power in range(10))
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name
+
+
+class CounterFlushMiddleware:
+    """После ответа сбрасывает в базу счётчики, у которых вышел срок.
+
+    Стоит первым, чтобы запись не попадала во время и запросы view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        counters.maybe_flush_all()
+        return response
+
+
+class MetricsMiddleware:
+    """Собирает время ответа и запросы к БД по каждому view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with wrap_all_connections(counter):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        view = view_name(request)
+        registry.inc('yatube_requests_total', {
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+        })
+        registry.observe(
+            'yatube_request_duration_seconds', duration, {'view': view}
+        )
+        registry.inc('yatube_db_queries_total', {'view': view}, counter.count)
+        registry.inc(
+            'yatube_db_query_duration_seconds_total', {'view': view},
+            counter.duration,
+        )
+        registry.observe(
+            'yatube_db_queries_per_request', counter.count, {'view': view},
+            buckets=COUNT_BUCKETS,
+        )
+        registry.maybe_flush()
+        return response
+
+
+def user_type(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    return 'staff' if user.is_staff else 'user'
+
+
+class SamplingProfilerMiddleware:
+    """Профилирует часть запросов и все запросы медленнее порога.
+
+    Доля PROFILER_SAMPLE_RATE профилируется целиком. У остальных запросов
+    стеки начинают сниматься, только когда запрос идёт дольше
+    PROFILER_SLOW_THRESHOLD_MS: быстрый запрос платит лишь за запись в
+    словарь семплера, а профиль медленного покрывает время после порога.
+    Профили пишутся в settings.PROFILER_DIR; без него middleware
+    отключается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sampler = sampling.Sampler(settings.PROFILER_INTERVAL_MS / 1000)
+
+    def __call__(self, request):
+        sampled = random.random() < settings.PROFILER_SAMPLE_RATE
+        threshold = settings.PROFILER_SLOW_THRESHOLD_MS
+        if not sampled and threshold is None:
+            return self.get_response(request)
+        started = time.time()
+        self.sampler.begin(delay=0 if sampled else threshold / 1000)
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = self.sampler.end()
+        duration_ms = (time.time() - started) * 1000
+        if sampled or duration_ms >= threshold:
+            sampling.write_profile(
+                settings.PROFILER_DIR,
+                sampling.profile_filename(
+                    started, duration_ms, user_type(request),
+                    view_name(request),
+                ),
+                stacks,
+                settings.PROFILER_MAX_FILES,
+            )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Закрепляет чтения за основной базой после записи клиента."""
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset()
+        if (
+            request.method not in self.safe_methods
+            or settings.REPLICA_PIN_COOKIE in request.COOKIES
+        ):
+            routers.pin_to_primary()
+        try:
+            response = self.get_response(request)
+            if routers.wrote_to_primary():
+                response.set_cookie(
+                    settings.REPLICA_PIN_COOKIE, '1',
+                    max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+                )
+        finally:
+            routers.reset()
+        return response
+
+
+class TemplateProfilingMiddleware:
+    """Пишет в лог разбивку времени рендеринга шаблонов по запросу."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        template_profiling.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile = template_profiling.stop()
+        rows = profile.breakdown(settings.TEMPLATE_PROFILING_LOG_LIMIT)
+        if rows:
+            template_logger.info(
+                '%s %s %s', view_name(request), request.path,
+                json.dumps(rows, ensure_ascii=False)
+            )
+        return response
+
+
+class MemoryAccountingMiddleware:
+    """Пиковая память запроса и крупные выборки по именам URL.
+
+    Включается настройкой MEMORY_PROFILING. На Python 3.9+ пик
+    считается через tracemalloc.reset_peak(), на более старых версиях
+    учитывается только прирост памяти за запрос.
+
+    Счётчики tracemalloc общие для процесса, поэтому пик верен только
+    в однопоточном воркере (gunicorn sync, runserver --nothreading).
+    Пик замеряется не больше чем у одного запроса за раз: запросы,
+    пришедшие во время замера в другом потоке, его пропускают, но их
+    выделения всё равно попадают в замер. Крупные выборки считаются
+    по потокам и верны всегда.
+    """
+
+    peak_lock = threading.Lock()
+
+    def __init__(self, get_response):
+        if not settings.MEMORY_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        memory.connect()
+
+    def __call__(self, request):
+        tracker = memory.start()
+        measure_peak = self.peak_lock.acquire(blocking=False)
+        try:
+            if measure_peak:
+                start_memory, _ = tracemalloc.get_traced_memory()
+                if hasattr(tracemalloc, 'reset_peak'):
+                    tracemalloc.reset_peak()
+            try:
+                with wrap_all_connections(tracker):
+                    response = self.get_response(request)
+            finally:
+                memory.stop()
+            used = None
+            if measure_peak:
+                current, peak = tracemalloc.get_traced_memory()
+                if not hasattr(tracemalloc, 'reset_peak'):
+                    peak = current
+                used = max(0, peak - start_memory)
+        finally:
+            if measure_peak:
+                self.peak_lock.release()
+        self.report(view_name(request), used, tracker)
+        return response
+
+    def report(self, view, used, tracker):
+        if used is not None:
+            registry.observe(
+                'yatube_request_memory_peak_bytes', used, {'view': view},
+                buckets=MEMORY_BUCKETS,
+            )
+            if used > settings.MEMORY_WARN_BYTES:
+                memory_logger.warning(
+                    '%s: пик памяти %s байт за запрос', view, used
+                )
+        large_queries = tracker.large_queries(settings.MEMORY_MAX_QUERY_ROWS)
+        for query in large_queries:
+            registry.inc('yatube_large_queries_total', {
+                'view': view, 'model': query['model'],
+            })
+            memory_logger.warning(
+                '%s: запрос вернул %s объектов %s: %s',
+                view, query['rows'], query['model'], query['sql'],
+            )
+        bursts = tracker.bursts(settings.MEMORY_MAX_MODEL_INSTANCES)
+        for label, count in bursts.items():
+            registry.inc('yatube_model_bursts_total', {
+                'view': view, 'model': label,
+            })
+            memory_logger.warning(
+                '%s: создано %s объектов %s за запрос', view, count, label
+            )
+
+
+def explain(query):
+    """План выполнения SELECT-запроса или None для остальных."""
+    if not query['sql'].lstrip().upper().startswith('SELECT'):
+        return None
+    connection = connections[query['alias']]
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {query["sql"]}', query['params'])
+            return [list(row) for row in cursor.fetchall()]
+    except Exception as exc:
+        return [f'{type(exc).__name__}: {exc}']
+
+
+class SlowRequestLogMiddleware:
+    """Пишет в лог запросы медленнее SLOW_REQUEST_THRESHOLD_MS.
+
+    Включается настройкой SLOW_REQUEST_LOG. Запись содержит SQL-запросы
+    и их время, а для запросов дольше SLOW_QUERY_EXPLAIN_THRESHOLD_MS
+    ещё и план выполнения. Параметры запросов бывают ключами сессий,
+    хешами паролей и адресами, поэтому пишутся только при
+    SLOW_REQUEST_LOG_PARAMS. Лог ротируется обработчиком из
+    settings.LOGGING.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_REQUEST_LOG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter(record=True)
+        start = time.perf_counter()
+        with wrap_all_connections(counter):
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            slow_logger.warning(json.dumps(
+                self.build_record(request, response, duration_ms, counter),
+                ensure_ascii=False, default=str,
+            ))
+        return response
+
+    def build_record(self, request, response, duration_ms, counter):
+        queries = []
+        for query in counter.queries[:settings.SLOW_REQUEST_MAX_QUERIES]:
+            query_ms = query['duration'] * 1000
+            record = {
+                'alias': query['alias'],
+                'sql': query['sql'],
+                'duration_ms': round(query_ms, 3),
+            }
+            if settings.SLOW_REQUEST_LOG_PARAMS:
+                record['params'] = query['params']
+            if query_ms >= settings.SLOW_QUERY_EXPLAIN_THRESHOLD_MS:
+                record['plan'] = explain(query)
+            queries.append(record)
+        user = getattr(request, 'user', None)
+        return {
+            'time': time.time(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': view_name(request),
+            'user_id': user.pk if user is not None else None,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 3),
+            'query_count': counter.count,
+            'query_ms': round(counter.duration * 1000, 3),
+            'queries': queries,
+        }
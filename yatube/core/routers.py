@@ -0,0 +1,74 @@
+"""Разделение чтения и записи между основной базой и репликами.
+
+Чтения моделей из DATABASE_REPLICA_APPS уходят на случайную реплику,
+все записи идут в основную базу. После записи запрос и последующие
+запросы того же клиента в течение REPLICA_PIN_SECONDS читают из
+основной базы, чтобы пользователь сразу видел свои изменения.
+"""
+import random
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def reset():
+    _state.pinned = False
+    _state.wrote = False
+
+
+def pin_to_primary():
+    _state.pinned = True
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def wrote_to_primary():
+    return getattr(_state, 'wrote', False)
+
+
+def routed(model):
+    return model._meta.app_label in settings.DATABASE_REPLICA_APPS
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if isinstance(instance, model) and instance._state.db:
+            # Отложенные поля объекта дочитываются из той же базы.
+            return instance._state.db
+        if not settings.DATABASE_REPLICAS or is_pinned() or not routed(model):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        if routed(model):
+            _state.pinned = True
+            _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def sync_replica(alias, source=DEFAULT_DB_ALIAS):
+    """Копирует основную базу SQLite в файл реплики через backup API."""
+    replica = connections[alias]
+    replica.close()
+    primary = connections[source]
+    primary.ensure_connection()
+    target = sqlite3.connect(replica.settings_dict['NAME'])
+    try:
+        primary.connection.backup(target)
+    finally:
+        target.close()
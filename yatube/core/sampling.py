@@ -0,0 +1,134 @@
+"""Семплирующий профилировщик для отдельных запросов.
+
+Один фоновый поток раз в interval секунд снимает стеки только тех
+потоков, для которых сейчас открыт профиль, и считает одинаковые стеки.
+Профиль можно открыть с задержкой: до её истечения стеки потока не
+снимаются.
+Результат сохраняется в collapsed-формате, который понимают
+flamegraph.pl, speedscope и аналогичные инструменты.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_SUFFIX = '.collapsed'
+PROFILE_NAME_RE = re.compile(
+    r'^(?P<started>\d+)_(?P<duration>\d+)ms_(?P<user>[a-z]+)_'
+    r'(?P<view>[\w.\-<>]+)\.collapsed$'
+)
+
+
+def frame_label(frame):
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}:{frame.f_code.co_name}'
+
+
+def collapse(frame):
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class Sampler:
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.active = {}
+        self.not_before = {}
+        self.thread = None
+
+    def begin(self, thread_id=None, delay=0):
+        if thread_id is None:
+            thread_id = threading.get_ident()
+        with self.lock:
+            self.active[thread_id] = Counter()
+            self.not_before[thread_id] = time.monotonic() + delay
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name='request-sampler', daemon=True
+                )
+                self.thread.start()
+
+    def end(self, thread_id=None):
+        if thread_id is None:
+            thread_id = threading.get_ident()
+        with self.lock:
+            self.not_before.pop(thread_id, None)
+            return self.active.pop(thread_id, Counter())
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            self.sample()
+
+    def sample(self):
+        with self.lock:
+            if not self.active:
+                return
+            now = time.monotonic()
+            due = [
+                thread_id for thread_id, start in self.not_before.items()
+                if start <= now
+            ]
+            if not due:
+                return
+            frames = sys._current_frames()
+            for thread_id in due:
+                stacks = self.active[thread_id]
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[collapse(frame)] += 1
+
+
+def profile_filename(started, duration_ms, user_type, view):
+    view = re.sub(r'[^\w.\-<>]', '.', view)
+    return (
+        f'{int(started)}_{int(duration_ms)}ms_{user_type}_{view}'
+        f'{PROFILE_SUFFIX}'
+    )
+
+
+def write_profile(directory, filename, stacks, max_files):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, filename), 'w') as file:
+        for stack, count in stacks.most_common():
+            file.write(f'{stack} {count}\n')
+    prune(directory, max_files)
+
+
+def prune(directory, max_files):
+    """Удаляет самые старые профили сверх max_files."""
+    names = sorted(
+        name for name in os.listdir(directory)
+        if PROFILE_NAME_RE.match(name)
+    )
+    for name in names[:max(0, len(names) - max_files)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def list_profiles(directory, limit):
+    """Сохранённые профили от самого медленного к самому быстрому."""
+    if not directory or not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        match = PROFILE_NAME_RE.match(name)
+        if match is None:
+            continue
+        profiles.append({
+            'name': name,
+            'started': int(match.group('started')),
+            'duration_ms': int(match.group('duration')),
+            'user_type': match.group('user'),
+            'view': match.group('view'),
+        })
+    profiles.sort(key=lambda profile: profile['duration_ms'], reverse=True)
+    return profiles[:limit]
@@ -0,0 +1,19 @@
+import bisect
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def percentile(values, percent):
+    """Процентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def histogram(values, buckets=LATENCY_BUCKETS_MS):
+    """Раскладывает значения по корзинам вида {'<=5': n, ..., '+Inf': n}."""
+    counts = [0] * (len(buckets) + 1)
+    for value in values:
+        counts[bisect.bisect_left(buckets, value)] += 1
+    labels = [f'<={bucket}' for bucket in buckets] + ['+Inf']
+    return dict(zip(labels, counts))
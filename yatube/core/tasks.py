@@ -0,0 +1,139 @@
+"""Фоновые задачи на таблице core.Task.
+
+Задачи регистрируются декоратором @task в модулях tasks.py приложений,
+ставятся в очередь через enqueue() и выполняются командой run_worker.
+"""
+import json
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger('yatube.tasks')
+registry = {}
+
+
+def task(name, max_attempts=5):
+    """Регистрирует функцию как фоновую задачу с именем name."""
+    def decorator(func):
+        registry[name] = (func, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(name, key=None, delay=0, **kwargs):
+    """Ставит задачу в очередь и возвращает запись Task.
+
+    Повторный вызов с тем же key не создаёт новую задачу. При
+    TASKS_EAGER задача выполняется сразу, без записи в таблицу.
+    """
+    func, max_attempts = registry[name]
+    if settings.TASKS_EAGER:
+        func(**kwargs)
+        return None
+    fields = {
+        'name': name,
+        'payload': json.dumps(kwargs, ensure_ascii=False),
+        'max_attempts': max_attempts,
+        'run_at': timezone.now() + timedelta(seconds=delay),
+    }
+    if key is None:
+        return Task.objects.create(**fields)
+    return Task.objects.get_or_create(idempotency_key=key, defaults=fields)[0]
+
+
+def backoff(attempts):
+    """Задержка перед следующей попыткой: экспонента со случайным шумом."""
+    delay = settings.TASKS_RETRY_BASE_DELAY * 2 ** (attempts - 1)
+    delay = min(delay, settings.TASKS_RETRY_MAX_DELAY)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim(limit):
+    """Захватывает до limit готовых задач и возвращает их.
+
+    Задачи, захват которых истёк (воркер упал), забираются повторно.
+    Захват идёт условным UPDATE, поэтому одну задачу не получат два
+    воркера.
+    """
+    now = timezone.now()
+    ready = (
+        Q(status=Task.PENDING, run_at__lte=now)
+        | Q(status=Task.RUNNING, locked_until__lt=now)
+    )
+    claimed = []
+    for pk in Task.objects.filter(ready).values_list('pk', flat=True)[:limit]:
+        updated = Task.objects.filter(ready, pk=pk).update(
+            status=Task.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=settings.TASKS_LEASE),
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed))
+
+
+def execute(task_obj):
+    """Выполняет захваченную задачу и сохраняет результат."""
+    try:
+        func, _ = registry[task_obj.name]
+        func(**json.loads(task_obj.payload))
+    except Exception:
+        task_obj.last_error = traceback.format_exc()
+        if task_obj.attempts >= task_obj.max_attempts:
+            task_obj.status = Task.FAILED
+            logger.error('Задача %s #%s провалена', task_obj.name, task_obj.pk)
+        else:
+            task_obj.status = Task.PENDING
+            task_obj.run_at = timezone.now() + timedelta(
+                seconds=backoff(task_obj.attempts)
+            )
+    else:
+        task_obj.status = Task.DONE
+    task_obj.locked_until = None
+    task_obj.save(update_fields=(
+        'status', 'run_at', 'locked_until', 'last_error', 'updated'
+    ))
+    return task_obj
+
+
+def run_pending(limit=100):
+    """Выполняет готовые задачи в текущем потоке."""
+    return [execute(task_obj) for task_obj in claim(limit)]
+
+
+class PeriodicScheduler:
+    """Ставит периодические задачи из TASKS_PERIODIC раз в интервал.
+
+    Ключ задачи включает номер интервала, поэтому при нескольких
+    воркерах задача всё равно ставится один раз.
+    """
+
+    def __init__(self, schedule=None):
+        if schedule is None:
+            schedule = settings.TASKS_PERIODIC
+        self.schedule = schedule
+        self.last_slots = {}
+
+    def tick(self, now=None):
+        now = time.time() if now is None else now
+        for name, interval in self.schedule.items():
+            slot = int(now // interval)
+            if self.last_slots.get(name) == slot:
+                continue
+            enqueue(name, key=f'periodic:{name}:{slot}')
+            self.last_slots[name] = slot
+
+
+@task('core.purge_tasks')
+def purge_tasks():
+    """Удаляет давно выполненные задачи."""
+    border = timezone.now() - timedelta(days=settings.TASKS_KEEP_DONE_DAYS)
+    Task.objects.filter(status=Task.DONE, updated__lt=border).delete()
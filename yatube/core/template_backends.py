@@ -0,0 +1,15 @@
+from django.template.backends.django import DjangoTemplates
+
+from . import template_profiling
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates с замерами времени рендеринга.
+
+    Замеры включаются только для запросов, которые проходят через
+    core.middleware.TemplateProfilingMiddleware.
+    """
+
+    def __init__(self, params):
+        super().__init__(params)
+        template_profiling.install(self.engine)
@@ -0,0 +1,155 @@
+"""Замеры времени рендеринга шаблонов, {% include %}, тегов и фильтров.
+
+install() подменяет Template._render и Node.render_annotated и
+оборачивает фильтры из библиотек движка. Пока для потока не запущен
+профиль через start(), обёртки сразу вызывают исходный код.
+"""
+import functools
+import threading
+import time
+
+from django.template.base import Node, Template, TextNode, VariableNode
+from django.template.loader_tags import IncludeNode
+
+from .metrics import registry
+
+_state = threading.local()
+_originals = {}
+_wrapped_filters = []
+_lock = threading.Lock()
+totals = {}
+
+
+class RenderProfile:
+    def __init__(self):
+        self.stats = {}
+        self.stack = []
+
+    def call(self, kind, name, func, *args, **kwargs):
+        # Кадр: [время начала, время вложенных вызовов].
+        frame = [time.perf_counter(), 0.0]
+        self.stack.append(frame)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            if self.stack:
+                self.stack[-1][1] += elapsed
+            stat = self.stats.setdefault((kind, name), [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] += elapsed - frame[1]
+
+    def breakdown(self, limit=None):
+        """Записи, отсортированные по собственному времени."""
+        rows = [
+            {
+                'kind': kind,
+                'name': name,
+                'calls': calls,
+                'cumulative_ms': round(cumulative * 1000, 3),
+                'self_ms': round(self_time * 1000, 3),
+            }
+            for (kind, name), (calls, cumulative, self_time)
+            in self.stats.items()
+        ]
+        rows.sort(key=lambda row: row['self_ms'], reverse=True)
+        return rows[:limit]
+
+
+def start():
+    _state.profile = RenderProfile()
+    return _state.profile
+
+
+def stop():
+    profile = getattr(_state, 'profile', None)
+    _state.profile = None
+    if profile is not None:
+        accumulate(profile)
+    return profile
+
+
+def accumulate(profile):
+    """Добавляет профиль запроса к накопленной статистике процесса."""
+    with _lock:
+        for key, (calls, cumulative, self_time) in profile.stats.items():
+            stat = totals.setdefault(key, [0, 0.0, 0.0])
+            stat[0] += calls
+            stat[1] += cumulative
+            stat[2] += self_time
+    for (kind, name), (calls, _, self_time) in profile.stats.items():
+        labels = {'kind': kind, 'name': name}
+        registry.inc('yatube_template_calls_total', labels, calls)
+        registry.inc('yatube_template_self_seconds_total', labels, self_time)
+
+
+def profiled(kind, name, func, *args, **kwargs):
+    profile = getattr(_state, 'profile', None)
+    if profile is None:
+        return func(*args, **kwargs)
+    return profile.call(kind, name, func, *args, **kwargs)
+
+
+def node_label(node):
+    if isinstance(node, IncludeNode):
+        return 'include', str(node.template.var)
+    token = getattr(node, 'token', None)
+    if token is None or not token.contents:
+        return 'tag', type(node).__name__
+    return 'tag', token.contents.split()[0]
+
+
+def wrap_filter(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Фильтры с needs_autoescape получают autoescape=.
+        return profiled('filter', name, func, *args, **kwargs)
+    return wrapper
+
+
+def install(engine):
+    """Подключает замеры для движка; повторный вызов безопасен."""
+    with _lock:
+        if not _originals:
+            original_render = Template._render
+            original_node = Node.render_annotated
+
+            def _render(self, context):
+                return profiled(
+                    'template', self.name or '<string>',
+                    original_render, self, context
+                )
+
+            def render_annotated(self, context):
+                if isinstance(self, (TextNode, VariableNode)):
+                    return original_node(self, context)
+                kind, name = node_label(self)
+                return profiled(kind, name, original_node, self, context)
+
+            _originals['_render'] = original_render
+            _originals['render_annotated'] = original_node
+            Template._render = _render
+            Node.render_annotated = render_annotated
+        libraries = list(engine.template_builtins)
+        libraries += list(engine.template_libraries.values())
+        for library in libraries:
+            for name, func in list(library.filters.items()):
+                if getattr(func, '_template_profiled', False):
+                    continue
+                wrapper = wrap_filter(name, func)
+                wrapper._template_profiled = True
+                library.filters[name] = wrapper
+                _wrapped_filters.append((library, name, func))
+
+
+def uninstall():
+    """Возвращает исходные методы и фильтры."""
+    with _lock:
+        if _originals:
+            Template._render = _originals.pop('_render')
+            Node.render_annotated = _originals.pop('render_annotated')
+        while _wrapped_filters:
+            library, name, func = _wrapped_filters.pop()
+            library.filters[name] = func
@@ -1,4 +1,49 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core import counters, sampling, tasks, template_profiling
+from core.auth import CachedModelBackend
+from core.counters import BufferedCounter, bulk_increment, drain_all
+from core.middleware import MemoryAccountingMiddleware, slow_logger
+from core.routers import sync_replica
+from core.management.commands.replay_log import parse_combined, read_entries
+from core.metrics import process_file, registry, render as render_metrics
+from core.models import Task
+from posts.models import Comment, Follow, Group, Post, User
+from posts.seed import seed_dataset
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+COMBINED_LINE = (
+    '203.0.113.7 - - [14/Mar/2023:21:48:01 +0300] "GET /group/x/?page=2 '
+    'HTTP/1.1" 200 5120 "-" "Mozilla/5.0"'
+)
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +51,635 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class ReplayLogTest(TransactionTestCase):
+    def setUp(self):
+        self.data = seed_dataset(
+            users=4, groups=1, posts=15, comments=5, follows_per_user=2
+        )
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmp_dir.name, 'access.log')
+        self.output = os.path.join(self.tmp_dir.name, 'report.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parse_combined_line(self):
+        """Строка combined-лога разбирается в запись"""
+        entry = parse_combined(COMBINED_LINE)
+        self.assertEqual(entry['method'], 'GET')
+        self.assertEqual(entry['path'], '/group/x/?page=2')
+        self.assertEqual(entry['session'], '203.0.113.7 Mozilla/5.0')
+
+    def test_replay_reports_per_url_name(self):
+        """Лог воспроизводится через WSGI и даёт отчёт по именам URL"""
+        post_id = self.data['post_ids'][0]
+        group = self.data['groups'][0]
+        lines = [
+            COMBINED_LINE.replace('/group/x/', f'/group/{group.slug}/'),
+            json.dumps({'ts': 1, 'path': '/', 'session': 'a',
+                        'anonymous': True}),
+            json.dumps({'ts': 2, 'path': f'/posts/{post_id}/',
+                        'session': 'b', 'anonymous': False}),
+            json.dumps({'ts': 3, 'method': 'POST', 'session': 'b',
+                        'path': f'/posts/{post_id}/comment/',
+                        'anonymous': False, 'data': {'text': 'replayed'}}),
+            json.dumps({'ts': 4, 'path': '/follow/', 'session': 'b',
+                        'anonymous': False}),
+        ]
+        with open(self.log, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines))
+        self.assertEqual(len(read_entries(self.log)), 5)
+        call_command(
+            'replay_log', self.log, '--workers', '2',
+            '--output', self.output, stdout=StringIO(), stderr=StringIO()
+        )
+        with open(self.output, encoding='utf-8') as file:
+            report = json.load(file)
+        self.assertEqual(report['requests'], 5)
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(report['urls']['posts:follow_index']['statuses'],
+                         {'200': 1})
+        self.assertIn('posts:group_posts', report['urls'])
+        self.assertTrue(
+            Comment.objects.filter(text='replayed', post_id=post_id).exists()
+        )
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTest(TestCase):
+    def setUp(self):
+        registry.clear()
+        cache.clear()
+
+    def get_metrics(self, token='secret'):
+        return self.client.get(
+            reverse('core:metrics'), HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+
+    def test_metrics_collects_requests_and_fragment_cache(self):
+        """/metrics отдаёт время ответа, запросы к БД и попадания в кэш"""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        content = self.get_metrics().content.decode()
+        self.assertIn(
+            'yatube_requests_total{method="GET",status="200",'
+            'view="posts:index"} 2', content
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            content
+        )
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', content)
+        self.assertIn(
+            'yatube_cache_requests_total{cache="index_page",result="hit"} 1',
+            content
+        )
+        self.assertIn(
+            'yatube_cache_requests_total{cache="index_page",result="miss"} 1',
+            content
+        )
+
+    def test_metrics_aggregates_worker_files(self):
+        """Метрики других воркеров складываются с метриками процесса"""
+        registry.inc('yatube_requests_total', {'view': 'posts:index'}, 2)
+        with tempfile.TemporaryDirectory() as directory:
+            with open(process_file(directory, 0), 'w') as file:
+                json.dump({
+                    'counters': [
+                        ['yatube_requests_total', {'view': 'posts:index'}, 3]
+                    ],
+                    'histograms': [],
+                }, file)
+            with override_settings(METRICS_DIR=directory):
+                registry.flush()
+                content = self.get_metrics().content.decode()
+        self.assertIn('yatube_requests_total{view="posts:index"} 5', content)
+
+    def test_metrics_require_token(self):
+        """/metrics недоступен без верного токена"""
+        response = self.client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.get_metrics('wrong').status_code, 404)
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.get_metrics('None').status_code, 404)
+
+
+@override_settings(
+    TEMPLATES=[{
+        **settings.TEMPLATES[0],
+        'BACKEND': 'core.template_backends.InstrumentedDjangoTemplates',
+    }],
+    MIDDLEWARE=settings.MIDDLEWARE + [
+        'core.middleware.TemplateProfilingMiddleware'
+    ],
+    TEMPLATE_PROFILING_LOG_LIMIT=100,
+)
+class TemplateProfilingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_profiling.totals.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        # Движок с замерами создаётся один раз на класс.
+        template_profiling.uninstall()
+        super().tearDownClass()
+
+    def test_request_breakdown_is_logged(self):
+        """Время шаблонов, include, тегов и фильтров попадает в лог"""
+        user = User.objects.create_user(username='auth')
+        self.client.force_login(user)
+        with self.assertLogs('yatube.templates', 'INFO') as logs:
+            self.client.get(reverse('posts:post_create'))
+        self.assertEqual(len(logs.records), 1)
+        message = logs.records[0].getMessage()
+        self.assertIn('posts:post_create', message)
+        self.assertIn('"kind": "filter", "name": "addclass"', message)
+        self.assertIn('"kind": "include", "name": "includes/header.html"',
+                      message)
+        self.assertIn(('template', 'posts/create_post.html'),
+                      template_profiling.totals)
+        self.assertIn(('filter', 'addclass'), template_profiling.totals)
+
+    def test_autoescape_filters_are_profiled(self):
+        """Фильтры с autoescape= работают и попадают в статистику"""
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Первая\n\nВторая'
+        )
+        response = self.client.get(
+            reverse('posts:group_posts', args=(group.slug,))
+        )
+        self.assertContains(response, '<p>Первая</p>')
+        self.assertIn(('filter', 'linebreaks'), template_profiling.totals)
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class SamplingProfilerTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_sampler_collects_only_active_thread(self):
+        """Семплер снимает стеки только профилируемого потока"""
+        sampler = sampling.Sampler(0.001)
+        worker = threading.Thread(target=busy_wait, args=(0.3,))
+        worker.start()
+        sampler.begin()
+        busy_wait(0.05)
+        stacks = sampler.end()
+        worker.join()
+        self.assertTrue(stacks)
+        self.assertTrue(all('busy_wait' in stack or 'test_sampler' in stack
+                            for stack in stacks))
+        self.assertFalse(any('threading:run' in stack for stack in stacks))
+
+    def test_delayed_profile_skips_fast_work(self):
+        """До истечения задержки стеки потока не снимаются"""
+        sampler = sampling.Sampler(0.001)
+        sampler.begin(delay=60)
+        busy_wait(0.05)
+        self.assertEqual(sampler.end(), {})
+
+    def test_slow_requests_are_listed_for_staff(self):
+        """Профили запросов пишутся в файлы и видны только персоналу"""
+        with override_settings(
+            PROFILER_DIR=self.tmp_dir.name,
+            PROFILER_SAMPLE_RATE=0,
+            PROFILER_SLOW_THRESHOLD_MS=0,
+        ):
+            self.client.get(reverse('posts:index'))
+            files = os.listdir(self.tmp_dir.name)
+            self.assertEqual(len(files), 1)
+            self.assertRegex(files[0], r'_anonymous_posts\.index\.collapsed$')
+            response = self.client.get(reverse('core:profiles'))
+            self.assertEqual(response.status_code, 302)
+            staff = User.objects.create_user(username='staff', is_staff=True)
+            self.client.force_login(staff)
+            response = self.client.get(reverse('core:profiles'))
+            self.assertIn(
+                files[0],
+                [profile['name'] for profile in response.context['profiles']]
+            )
+            response = self.client.get(
+                reverse('core:profile_file', args=(files[0],))
+            )
+            self.assertEqual(response.status_code, 200)
+
+
+@override_settings(
+    MEMORY_PROFILING=True,
+    MEMORY_MAX_QUERY_ROWS=5,
+    MEMORY_MAX_MODEL_INSTANCES=8,
+)
+class MemoryAccountingTest(TestCase):
+    def setUp(self):
+        registry.clear()
+
+    def test_large_comment_list_is_flagged(self):
+        """Крупная выборка комментариев попадает в лог и метрики"""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(author=user, text='Пост')
+        Comment.objects.bulk_create(
+            Comment(post=post, author=user, text=f'Комментарий {number}')
+            for number in range(10)
+        )
+        with self.assertLogs('yatube.memory', 'WARNING') as logs:
+            self.client.get(reverse('posts:post_detail', args=(post.pk,)))
+        messages = '\n'.join(record.getMessage() for record in logs.records)
+        self.assertIn('запрос вернул 10 объектов posts.Comment', messages)
+        self.assertIn('объектов posts.Comment за запрос', messages)
+        content = render_metrics()
+        self.assertIn(
+            'yatube_large_queries_total{model="posts.Comment",'
+            'view="posts:post_detail"} 1', content
+        )
+        self.assertIn(
+            'yatube_request_memory_peak_bytes_count'
+            '{view="posts:post_detail"} 1', content
+        )
+
+    def test_concurrent_request_skips_peak(self):
+        """Пока идёт замер пика, другой запрос его не снимает"""
+        with MemoryAccountingMiddleware.peak_lock:
+            self.client.get(reverse('about:author'))
+        self.assertNotIn(
+            'yatube_request_memory_peak_bytes_count{view="about:author"}',
+            render_metrics(),
+        )
+
+
+@override_settings(
+    SLOW_REQUEST_LOG=True,
+    SLOW_REQUEST_THRESHOLD_MS=0,
+    SLOW_QUERY_EXPLAIN_THRESHOLD_MS=0,
+)
+class SlowRequestLogTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        Follow.objects.create(
+            user=self.user,
+            author=User.objects.create_user(username='author'),
+        )
+        self.client.force_login(self.user)
+
+    def slow_record(self):
+        with self.assertLogs('yatube.slow_requests', 'WARNING') as logs:
+            self.client.get(reverse('posts:follow_index'))
+        return json.loads(logs.records[0].getMessage())
+
+    def test_slow_request_record_has_sql_and_plans(self):
+        """Медленный запрос пишется в лог с SQL и планами выполнения"""
+        record = self.slow_record()
+        self.assertEqual(record['view'], 'posts:follow_index')
+        self.assertEqual(record['user_id'], self.user.pk)
+        self.assertEqual(record['query_count'], len(record['queries']))
+        selects = [
+            query for query in record['queries']
+            if query['sql'].startswith('SELECT')
+        ]
+        self.assertTrue(selects)
+        for query in selects:
+            self.assertNotIn('params', query)
+            self.assertTrue(query['plan'])
+
+    @override_settings(SLOW_REQUEST_LOG_PARAMS=True)
+    def test_params_logged_only_when_enabled(self):
+        """Параметры SQL попадают в лог только по явной настройке"""
+        record = self.slow_record()
+        self.assertTrue(all('params' in query for query in record['queries']))
+
+    @override_settings(SLOW_REQUEST_LOG=False)
+    def test_disabled_by_default(self):
+        """Без SLOW_REQUEST_LOG журнал не пишется"""
+        with mock.patch.object(slow_logger, 'warning') as warning:
+            self.client.get(reverse('posts:follow_index'))
+        warning.assert_not_called()
+
+
+class SQLiteTuningTest(TestCase):
+    def test_pragmas_applied_to_connection(self):
+        """Новое соединение SQLite получает PRAGMA из настроек"""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout']
+            )
+
+    def test_bench_sqlite_reports_both_variants(self):
+        """Бенчмарк SQLite сравнивает стоковую и настроенную базы"""
+        out = StringIO()
+        call_command(
+            'bench_sqlite', '--duration', '0.2', '--rows', '100',
+            '--readers', '1', '--writers', '1', stdout=out
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('stock'))
+        self.assertTrue(lines[1].startswith('tuned'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReadReplicaRouterTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        connections.databases['replica'] = {
+            **connections.databases['default'],
+            'NAME': os.path.join(cls.tmp_dir.name, 'replica.sqlite3'),
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.databases['replica']
+        if hasattr(connections._connections, 'replica'):
+            delattr(connections._connections, 'replica')
+        cls.tmp_dir.cleanup()
+
+    def profile_texts(self, client, user):
+        response = client.get(reverse('posts:profile', args=(user,)))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_reads_stick_to_primary_after_write(self):
+        """После записи автор читает из основной базы, остальные с реплики"""
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Старый пост')
+        sync_replica('replica')
+        author_client = Client()
+        author_client.force_login(author)
+        response = author_client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertEqual(
+            response.cookies[settings.REPLICA_PIN_COOKIE]['max-age'],
+            settings.REPLICA_PIN_SECONDS
+        )
+        self.assertEqual(
+            self.profile_texts(Client(), author), ['Старый пост']
+        )
+        self.assertEqual(
+            self.profile_texts(author_client, author),
+            ['Новый пост', 'Старый пост']
+        )
+        sync_replica('replica')
+        self.assertEqual(
+            self.profile_texts(Client(), author),
+            ['Новый пост', 'Старый пост']
+        )
+
+
+@tasks.task('tests.flaky', max_attempts=2)
+def flaky(fail):
+    if fail:
+        raise ValueError('Ошибка задачи')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TaskQueueTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_idempotency_key_deduplicates(self):
+        """Задача с тем же ключом ставится в очередь один раз"""
+        first = tasks.enqueue('tests.flaky', key='same', fail=False)
+        second = tasks.enqueue('tests.flaky', key='same', fail=False)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+        tasks.run_pending()
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+        tasks.enqueue('tests.flaky', key='same', fail=False)
+        self.assertEqual(tasks.run_pending(), [])
+
+    def test_failed_task_retried_with_backoff(self):
+        """Упавшая задача откладывается, затем помечается ошибкой"""
+        task_obj = tasks.enqueue('tests.flaky', fail=True)
+        tasks.run_pending()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.PENDING)
+        self.assertEqual(task_obj.attempts, 1)
+        self.assertGreater(task_obj.run_at, task_obj.created)
+        self.assertIn('Ошибка задачи', task_obj.last_error)
+        self.assertEqual(tasks.run_pending(), [])
+        Task.objects.update(run_at=task_obj.created)
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            tasks.run_pending()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.FAILED)
+
+    def test_periodic_scheduler_enqueues_once_per_slot(self):
+        """Периодическая задача ставится один раз за интервал"""
+        schedule = {'tests.flaky': 60}
+        tasks.PeriodicScheduler(schedule).tick(now=600)
+        tasks.PeriodicScheduler(schedule).tick(now=630)
+        self.assertEqual(Task.objects.count(), 1)
+        tasks.PeriodicScheduler(schedule).tick(now=660)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_post_create_enqueues_thumbnails(self):
+        """Создание поста с картинкой ставит генерацию миниатюр"""
+        user = User.objects.create_user(username='auth')
+        self.client.force_login(user)
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        })
+        task_obj = Task.objects.get(name='posts.generate_thumbnails')
+        self.assertEqual(
+            json.loads(task_obj.payload),
+            {'post_id': Post.objects.get().pk}
+        )
+        call_command('run_worker', '--once', '--no-periodic',
+                     '--concurrency', '1', stdout=StringIO())
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.DONE)
+
+    def test_password_reset_email_is_queued(self):
+        """Письмо сброса пароля уходит через очередь задач"""
+        User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass-1234'
+        )
+        self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'auth@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        tasks.run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
+
+    def test_password_reset_payload_has_no_token(self):
+        """Токен сброса пароля создаётся воркером и не хранится в задаче"""
+        user = User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass-1234'
+        )
+        self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'auth@example.com'}
+        )
+        payload = json.loads(Task.objects.get(name='users.send_email').payload)
+        self.assertEqual(payload['user_id'], user.pk)
+        self.assertNotIn('token', payload)
+        self.assertNotIn('/reset/', json.dumps(payload))
+        tasks.run_pending()
+        uid = urlsafe_base64_encode(force_bytes(user.pk))
+        token = mail.outbox[0].body.split(f'/reset/{uid}/')[1].split('/')[0]
+        self.assertTrue(default_token_generator.check_token(user, token))
+
+
+class CachedAuthTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='auth', password='pass-1234'
+        )
+        self.client.force_login(self.user)
+
+    def test_warm_request_skips_session_and_user_queries(self):
+        """Повторный запрос берёт сессию и пользователя из кэша"""
+        url = reverse('about:author')
+        self.client.get(url)
+        drain_all()
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_warm_snapshot_read_in_one_round_trip(self):
+        """Версия и снимок пользователя читаются одним get_many"""
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        shared = mock.Mock(wraps=caches['shared'])
+        with mock.patch('core.auth.caches', {'shared': shared}):
+            self.assertEqual(backend.get_user(self.user.pk), self.user)
+        self.assertEqual(
+            [call[0] for call in shared.method_calls], ['get_many']
+        )
+
+    def test_sessions_of_model_backend_stay_valid(self):
+        """Сессии, созданные с ModelBackend, по-прежнему действуют"""
+        client = Client()
+        client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = client.get(reverse('about:author'))
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_snapshot_lives_in_shared_cache(self):
+        """Снимок пользователя хранится в общем кэше процессов"""
+        url = reverse('about:author')
+        self.client.get(url)
+        cache.clear()
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(url)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_user_save_invalidates_snapshot(self):
+        """Сохранение пользователя сбрасывает снимок в кэше"""
+        url = reverse('about:author')
+        self.client.get(url)
+        self.user.first_name = 'Новое'
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.wsgi_request.user.first_name, 'Новое')
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля закэшированная сессия больше не действует"""
+        url = reverse('about:author')
+        self.client.get(url)
+        self.user.set_password('new-pass-5678')
+        self.user.save()
+        response = self.client.get(url)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+
+@override_settings(TEST_FLUSH_EVERY=100, TEST_FLUSH_INTERVAL=60)
+class BufferedCounterTest(TestCase):
+    def setUp(self):
+        self.written = []
+        self.counter = BufferedCounter('test', self.written.append, 'TEST')
+        self.addCleanup(counters.counters.remove, self.counter)
+
+    def test_drain_returns_accumulated_deltas(self):
+        """drain() отдаёт накопленные приросты и обнуляет их"""
+        for pk in (1, 2, 1, 1):
+            self.counter.incr(pk)
+        self.assertEqual(self.counter.pending([1, 2, 3]), {1: 3, 2: 1})
+        self.assertEqual(self.counter.drain(), {1: 3, 2: 1})
+        self.assertEqual(self.counter.drain(), {})
+        self.counter.incr(2, 5)
+        self.assertEqual(self.counter.drain(), {2: 5})
+
+    @override_settings(TEST_FLUSH_EVERY=3)
+    def test_flushed_every_n_increments(self):
+        """Каждые N приростов буфер пишется одним вызовом write"""
+        for pk in (1, 2, 1, 1):
+            self.counter.incr(pk)
+        self.assertEqual(self.written, [{1: 2, 2: 1}])
+        self.assertEqual(self.counter.pending([1, 2]), {1: 1})
+
+    def test_flushed_after_interval(self):
+        """После интервала буфер сбрасывается по окончании запроса"""
+        drain_all()
+        self.counter.incr(1)
+        counters.maybe_flush_all()
+        self.assertEqual(self.written, [])
+        later = time.monotonic() + 60
+        with mock.patch('core.counters.time.monotonic', return_value=later):
+            self.client.get(reverse('about:author'))
+        self.assertEqual(self.written, [{1: 1}])
+
+    def test_failed_flush_restores_deltas(self):
+        """Если запись упала, приросты возвращаются в буфер"""
+        self.counter.write = mock.Mock(side_effect=RuntimeError)
+        self.counter.incr(1, 3)
+        with self.assertRaises(RuntimeError):
+            self.counter.flush()
+        self.counter.incr(1)
+        self.assertEqual(self.counter.drain(), {1: 4})
+
+    def test_bulk_increment_single_update(self):
+        """Приросты для разных строк применяются одним UPDATE"""
+        author = User.objects.create_user(username='auth')
+        posts = [
+            Post.objects.create(author=author, text=f'Пост {number}')
+            for number in range(3)
+        ]
+        with self.assertNumQueries(1):
+            bulk_increment(
+                Post.objects.all(), 'trending_score',
+                {posts[0].pk: 2, posts[1].pk: 5},
+            )
+        self.assertEqual(
+            [post.trending_score
+             for post in Post.objects.order_by('pk')],
+            [2, 5, 0],
+        )
+
+
+class MigrationsTest(TestCase):
+    def test_models_match_migrations(self):
+        """Модели не расходятся с миграциями"""
+        output = StringIO()
+        try:
+            call_command(
+                'makemigrations', check=True, dry_run=True, stdout=output
+            )
+        except SystemExit:
+            self.fail(output.getvalue())
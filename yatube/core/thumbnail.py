@@ -0,0 +1,19 @@
+import time
+
+from sorl.thumbnail.engines.pil_engine import Engine
+
+from .metrics import registry
+
+
+class InstrumentedEngine(Engine):
+    """PIL-движок sorl-thumbnail, замеряющий время генерации миниатюр."""
+
+    def create(self, image, geometry, options):
+        start = time.perf_counter()
+        try:
+            return super().create(image, geometry, options)
+        finally:
+            registry.observe(
+                'yatube_thumbnail_duration_seconds',
+                time.perf_counter() - start,
+            )
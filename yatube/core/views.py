@@ -1,5 +1,14 @@
+import hmac
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
 
+from .metrics import render as render_metrics
+from .sampling import PROFILE_NAME_RE, list_profiles
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -7,3 +16,36 @@ def page_not_found(request, exception):
 
 def permission_denied(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not token or not hmac.compare_digest(header, f'Bearer {token}'):
+        raise Http404
+    return HttpResponse(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@staff_member_required
+def profiles(request):
+    context = {
+        'profiles': list_profiles(
+            settings.PROFILER_DIR, settings.PROFILER_LIST_LIMIT
+        ),
+    }
+    return render(request, 'core/profiles.html', context)
+
+
+@staff_member_required
+def profile_file(request, name):
+    if not settings.PROFILER_DIR or not PROFILE_NAME_RE.match(name):
+        raise Http404
+    path = os.path.join(settings.PROFILER_DIR, name)
+    if not os.path.isfile(path):
+        raise Http404
+    return FileResponse(
+        open(path, 'rb'), content_type='text/plain; charset=utf-8'
+    )
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from .models import (Comment, Follow, FollowSuggestion, Group, Like,
+                     Notification, Post)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -32,3 +33,6 @@ admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment)
 admin.site.register(Follow)
+admin.site.register(Like)
+admin.site.register(Notification)
+admin.site.register(FollowSuggestion)
@@ -0,0 +1,242 @@
+"""JSON-эндпоинты: действия без перезагрузки страницы и API для чтения.
+
+API чтения отдаёт строки values() без создания моделей, поля выбираются
+параметром ?fields= из белого списка, страницы листаются курсором по
+(дата, id), испорченный курсор даёт 400. ETag — хэш тела, поэтому
+клиент с актуальной копией получает 304 без тела.
+"""
+import json
+from hashlib import md5
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET, require_POST
+
+from .feed import forget_unread, unread_count
+from .likes import like_counter, likes_count, toggle_like
+from .models import Comment, Follow, Group, Post, User
+from .utils import cursor_page, decode_cursor
+from .view_counts import view_counter
+
+# Имя поля в API → поле для values().
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'likes': 'likes_count',
+    'views': 'views',
+}
+POST_DEFAULT_FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+COMMENT_DEFAULT_FIELDS = tuple(COMMENT_FIELDS)
+
+
+def login_required_json(view):
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'error': 'Требуется авторизация'}, status=401
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def follow_state(author, following):
+    return JsonResponse({
+        'following': following,
+        'followers_count': author.following.count(),
+    })
+
+
+@require_POST
+@login_required_json
+def profile_follow(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    if author.pk == request.user.pk:
+        return JsonResponse(
+            {'error': 'Нельзя подписаться на себя'}, status=400
+        )
+    Follow.objects.bulk_create(
+        [Follow(user_id=request.user.pk, author_id=author.pk)],
+        ignore_conflicts=True,
+    )
+    forget_unread(request.user.pk)
+    return follow_state(author, True)
+
+
+@require_POST
+@login_required_json
+def profile_unfollow(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    Follow.objects.filter(user_id=request.user.pk, author=author).delete()
+    forget_unread(request.user.pk)
+    return follow_state(author, False)
+
+
+@require_POST
+@login_required_json
+def post_like(request, post_id):
+    post = get_object_or_404(Post.objects.only('likes_count'), pk=post_id)
+    liked = toggle_like(request.user, post.pk)
+    return JsonResponse({'liked': liked, 'likes_count': likes_count(post)})
+
+
+@require_GET
+@never_cache
+@login_required_json
+def feed_unread(request):
+    return JsonResponse({'unread': unread_count(request.user)})
+
+
+def selected_fields(request, allowed, default):
+    """Поля из ?fields= по порядку или None, если есть неизвестные."""
+    value = request.GET.get('fields')
+    if not value:
+        return list(default)
+    names = list(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()
+    ))
+    if not names or any(name not in allowed for name in names):
+        return None
+    return names
+
+
+def unknown_fields(allowed):
+    return JsonResponse({
+        'error': 'Неизвестное поле в fields',
+        'allowed': list(allowed),
+    }, status=400)
+
+
+def post_rows(queryset, names):
+    """Строки постов: поля names и, для курсора, id и pub_date."""
+    paths = {POST_FIELDS[name] for name in names} | {'id', 'pub_date'}
+    return queryset.values(*paths)
+
+
+def serialize_posts(rows, names):
+    storage = Post._meta.get_field('image').storage
+    ids = [row['id'] for row in rows]
+    pending = {
+        'likes': like_counter.pending(ids) if 'likes' in names else {},
+        'views': view_counter.pending(ids) if 'views' in names else {},
+    }
+    items = []
+    for row in rows:
+        item = {name: row[POST_FIELDS[name]] for name in names}
+        if item.get('image'):
+            item['image'] = storage.url(item['image'])
+        for name, values in pending.items():
+            if name in item:
+                item[name] += values.get(row['id'], 0)
+        items.append(item)
+    return items
+
+
+def json_response(request, value):
+    """JSON-ответ с ETag по содержимому."""
+    body = json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+    etag = quote_etag(md5(body.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+def page_response(request, items, next_cursor):
+    return json_response(request, {'results': items, 'next': next_cursor})
+
+
+def invalid_cursor(request):
+    cursor = request.GET.get('cursor')
+    if cursor and decode_cursor(cursor) is None:
+        return JsonResponse({'error': 'Неверный курсор'}, status=400)
+    return None
+
+
+def posts_page(request, queryset):
+    names = selected_fields(request, POST_FIELDS, POST_DEFAULT_FIELDS)
+    if names is None:
+        return unknown_fields(POST_FIELDS)
+    error = invalid_cursor(request)
+    if error is not None:
+        return error
+    rows, next_cursor = cursor_page(
+        post_rows(queryset, names),
+        request.GET.get('cursor'),
+        size=settings.API_PAGE_SIZE,
+        row_key=lambda row: (row['pub_date'], row['id']),
+    )
+    return page_response(request, serialize_posts(rows, names), next_cursor)
+
+
+@require_GET
+def posts_list(request):
+    return posts_page(request, Post.objects.all())
+
+
+@require_GET
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return posts_page(request, Post.objects.filter(group=group))
+
+
+@require_GET
+def profile_posts(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return posts_page(request, Post.objects.filter(author=author))
+
+
+@require_GET
+@login_required_json
+def follow_posts(request):
+    return posts_page(
+        request, Post.objects.filter(author__following__user=request.user)
+    )
+
+
+@require_GET
+def post_detail(request, post_id):
+    names = selected_fields(request, POST_FIELDS, POST_DEFAULT_FIELDS)
+    if names is None:
+        return unknown_fields(POST_FIELDS)
+    row = get_object_or_404(post_rows(Post.objects.all(), names), pk=post_id)
+    return json_response(request, serialize_posts([row], names)[0])
+
+
+@require_GET
+def post_comments(request, post_id):
+    names = selected_fields(request, COMMENT_FIELDS, COMMENT_DEFAULT_FIELDS)
+    if names is None:
+        return unknown_fields(COMMENT_FIELDS)
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    error = invalid_cursor(request)
+    if error is not None:
+        return error
+    paths = {COMMENT_FIELDS[name] for name in names} | {'id', 'created'}
+    rows, next_cursor = cursor_page(
+        Comment.objects.filter(post_id=post_id).values(*paths),
+        request.GET.get('cursor'),
+        date_lookup='created',
+        size=settings.API_PAGE_SIZE,
+        row_key=lambda row: (row['created'], row['id']),
+    )
+    items = [
+        {name: row[COMMENT_FIELDS[name]] for name in names} for row in rows
+    ]
+    return page_response(request, items, next_cursor)
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .feed import unread_count
+
+
+def feed_unread(request):
+    """Число новых постов подписок для шапки, считается по требованию."""
+    if not request.user.is_authenticated:
+        return {}
+    return {
+        'feed_unread': SimpleLazyObject(
+            lambda: unread_count(request.user)
+        ),
+        'feed_poll_seconds': settings.FEED_POLL_SECONDS,
+    }
@@ -0,0 +1,190 @@
+"""Поиск почти одинаковых постов: MinHash и LSH.
+
+Текст разбивается на шинглы из MINHASH_SHINGLE_SIZE слов, подпись —
+минимумы MINHASH_PERMUTATIONS хэш-функций по шинглам. Подпись делится
+на MINHASH_BANDS полос, хэш каждой полосы — корзина в PostBand. Посты
+с общей корзиной — кандидаты; сходство кандидатов оценивается по доле
+совпавших значений подписи.
+"""
+import re
+import zlib
+from functools import lru_cache
+from itertools import groupby
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .models import Post, PostBand, PostSignature
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+WORD_RE = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=None)
+def permutations(count, seed):
+    generator = np.random.RandomState(seed)
+    a = generator.randint(1, 1 << 32, size=count, dtype=np.uint64)
+    b = generator.randint(0, 1 << 32, size=count, dtype=np.uint64)
+    return a.reshape(-1, 1), b.reshape(-1, 1)
+
+
+def words(text):
+    return WORD_RE.findall(text.lower())
+
+
+def signature(text):
+    """MinHash-подпись текста или None, если слов меньше шингла."""
+    tokens = words(text)
+    size = settings.MINHASH_SHINGLE_SIZE
+    if len(tokens) < size:
+        return None
+    shingles = {
+        ' '.join(tokens[start:start + size])
+        for start in range(len(tokens) - size + 1)
+    }
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode()) for shingle in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    a, b = permutations(settings.MINHASH_PERMUTATIONS, settings.MINHASH_SEED)
+    values = ((a * hashes + b) % MERSENNE_PRIME) & MAX_HASH
+    return values.min(axis=1).astype(np.uint32)
+
+
+def band_keys(minhash):
+    """Ключи корзин LSH: номер полосы в старших битах, хэш — в младших."""
+    bands = np.split(minhash.astype('<u4'), settings.MINHASH_BANDS)
+    return [
+        number << 32 | zlib.crc32(band.tobytes())
+        for number, band in enumerate(bands)
+    ]
+
+
+def similarity(first, second):
+    """Оценка коэффициента Жаккара по двум подписям."""
+    return float(np.mean(first == second))
+
+
+def to_bytes(minhash):
+    return minhash.astype('<u4').tobytes()
+
+
+def from_bytes(value):
+    return np.frombuffer(bytes(value), dtype='<u4')
+
+
+def find_duplicates(text, exclude=None):
+    """id постов, почти совпадающих с text, по индексу LSH."""
+    minhash = signature(text)
+    if minhash is None:
+        return []
+    candidates = PostSignature.objects.filter(
+        post_id__in=PostBand.objects.filter(
+            key__in=band_keys(minhash)
+        ).values('post_id')
+    )
+    if exclude is not None:
+        candidates = candidates.exclude(post_id=exclude)
+    return [
+        post_id
+        for post_id, stored in candidates.values_list('post_id', 'minhash')
+        if similarity(minhash, from_bytes(stored))
+        >= settings.DUPLICATE_THRESHOLD
+    ]
+
+
+def index_post(post):
+    """Сохраняет подпись и корзины поста, заменяя прежние."""
+    minhash = signature(post.text)
+    with transaction.atomic():
+        PostBand.objects.filter(post=post).delete()
+        if minhash is None:
+            PostSignature.objects.filter(post=post).delete()
+            return
+        PostSignature.objects.update_or_create(
+            post=post, defaults={'minhash': to_bytes(minhash)}
+        )
+        PostBand.objects.bulk_create(
+            PostBand(post=post, key=key) for key in band_keys(minhash)
+        )
+
+
+def index_missing(batch_size=500):
+    """Индексирует посты без подписи, возвращает их число."""
+    post_ids = list(Post.objects.filter(
+        signature__isnull=True
+    ).values_list('pk', flat=True))
+    for start in range(0, len(post_ids), batch_size):
+        posts = Post.objects.filter(
+            pk__in=post_ids[start:start + batch_size]
+        ).only('text')
+        for post in posts:
+            index_post(post)
+    return len(post_ids)
+
+
+class DisjointSet:
+    def __init__(self):
+        self.parents = {}
+
+    def find(self, item):
+        root = self.parents.setdefault(item, item)
+        while self.parents[root] != root:
+            root = self.parents[root]
+        while item != root:
+            item, self.parents[item] = self.parents[item], root
+        return root
+
+    def union(self, first, second):
+        self.parents[self.find(first)] = self.find(second)
+
+
+def duplicate_clusters(min_size=2, batch_size=500):
+    """Группы id почти одинаковых постов, крупные первыми.
+
+    Корзины читаются потоком по ключу; каждый пост корзины сравнивается
+    с её первым постом, совпавшие объединяются.
+    """
+    rows = PostBand.objects.order_by('key').values_list('key', 'post_id')
+    buckets = (
+        [post_id for _, post_id in group]
+        for _, group in groupby(rows.iterator(), key=lambda row: row[0])
+    )
+    clusters = DisjointSet()
+    batch = []
+    for bucket in buckets:
+        if len(bucket) > 1:
+            batch.append(bucket)
+        if len(batch) == batch_size:
+            merge_buckets(batch, clusters)
+            batch = []
+    merge_buckets(batch, clusters)
+    groups = {}
+    for post_id in clusters.parents:
+        groups.setdefault(clusters.find(post_id), []).append(post_id)
+    return sorted(
+        (sorted(group) for group in groups.values() if len(group) >= min_size),
+        key=len, reverse=True,
+    )
+
+
+def merge_buckets(buckets, clusters):
+    post_ids = sorted({post_id for bucket in buckets for post_id in bucket})
+    signatures = {}
+    for start in range(0, len(post_ids), 500):
+        signatures.update(
+            (post_id, from_bytes(stored))
+            for post_id, stored in PostSignature.objects.filter(
+                post_id__in=post_ids[start:start + 500]
+            ).values_list('post_id', 'minhash')
+        )
+    for first, *others in buckets:
+        if first not in signatures:
+            continue
+        for other in others:
+            if other in signatures and similarity(
+                signatures[first], signatures[other]
+            ) >= settings.DUPLICATE_THRESHOLD:
+                clusters.union(other, first)
@@ -0,0 +1,83 @@
+"""Счётчик непрочитанного в ленте подписок.
+
+Просмотр ленты запоминает время в FeedVisit. Число постов подписок,
+вышедших позже, считается по базе один раз и хранится в общем кэше по
+пользователю; новый пост увеличивает уже закэшированные счётчики
+подписчиков задачей posts.bump_unread, а смена подписок удаляет ключ
+в кэше без записи в базу. Шапка и опрос эндпоинта читают только кэш;
+при промахе счётчик пересчитывается.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .models import FeedVisit, Follow, Post
+from .notifications import chunked
+
+
+def shared_cache():
+    return caches['shared']
+
+
+def unread_key(user_id):
+    return f'feed:unread:{user_id}'
+
+
+def unread_count(user):
+    """Число новых постов подписок, не больше FEED_UNREAD_MAX."""
+    key = unread_key(user.pk)
+    count = shared_cache().get(key)
+    if count is None:
+        posts = Post.objects.filter(author__following__user=user)
+        last_seen = FeedVisit.objects.filter(user=user).values_list(
+            'last_seen', flat=True
+        ).first()
+        if last_seen is not None:
+            posts = posts.filter(pub_date__gt=last_seen)
+        count = posts[:settings.FEED_UNREAD_MAX].count()
+        shared_cache().set(key, count, settings.FEED_UNREAD_TIMEOUT)
+    return min(count, settings.FEED_UNREAD_MAX)
+
+
+def mark_seen(user):
+    """Отмечает ленту прочитанной, возвращает прежнее время просмотра."""
+    now = timezone.now()
+    last_seen = FeedVisit.objects.filter(user=user).values_list(
+        'last_seen', flat=True
+    ).first()
+    if last_seen is None:
+        FeedVisit.objects.bulk_create(
+            [FeedVisit(user=user, last_seen=now)], ignore_conflicts=True
+        )
+    else:
+        FeedVisit.objects.filter(user=user).update(last_seen=now)
+    shared_cache().set(
+        unread_key(user.pk), 0, settings.FEED_UNREAD_TIMEOUT
+    )
+    return last_seen
+
+
+def forget_unread(user_id):
+    """Сбрасывает счётчик после смены подписок."""
+    shared_cache().delete(unread_key(user_id))
+
+
+def bump_unread(author_id, batch_size=500):
+    """Увеличивает закэшированные счётчики подписчиков автора.
+
+    Незакэшированные счётчики не трогаются: их пересчитает следующее
+    чтение. Возвращает число увеличенных счётчиков.
+    """
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True
+    )
+    cache = shared_cache()
+    bumped = 0
+    for batch in chunked(followers.iterator(), batch_size):
+        for key in cache.get_many([unread_key(pk) for pk in batch]):
+            try:
+                cache.incr(key)
+            except ValueError:
+                continue
+            bumped += 1
+    return bumped
@@ -1,5 +1,7 @@
 from django import forms
+from django.conf import settings
 
+from .duplicates import find_duplicates, words
 from .models import Comment, Post
 
 
@@ -16,6 +18,16 @@ class PostForm(forms.ModelForm):
             "group": "Группа, к которой будет относиться пост",
         }
 
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        if len(words(text)) >= settings.DUPLICATE_MIN_WORDS and (
+            find_duplicates(text, exclude=self.instance.pk)
+        ):
+            raise forms.ValidationError(
+                'Почти такой же текст уже опубликован.'
+            )
+        return text
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
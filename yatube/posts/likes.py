@@ -0,0 +1,83 @@
+"""Лайки постов со счётчиком в кэше.
+
+Факт лайка хранится в Like с уникальной парой (пользователь, пост),
+а Post.likes_count обновляется отложенно: переключение меняет счётчик в
+памяти процесса на ±1, а процесс пишет приросты одним UPDATE раз в
+LIKES_FLUSH_INTERVAL секунд или после LIKES_FLUSH_EVERY переключений.
+Популярный пост поэтому не превращается в строку, за которую спорят
+все запросы.
+"""
+from django.utils.functional import cached_property
+
+from core.counters import BufferedCounter, bulk_increment
+
+from .models import Like, Post
+
+
+def write_likes(deltas):
+    """Прибавляет приросты к Post.likes_count, не опуская его ниже нуля.
+
+    Отрицательный итог бывает, если парный +1 был потерян, и не должен
+    ронять весь UPDATE.
+    """
+    bulk_increment(Post.objects.all(), 'likes_count', deltas, minimum=0)
+
+
+like_counter = BufferedCounter('post_likes', write_likes, 'LIKES')
+
+
+def toggle_like(user, post_id):
+    """Ставит или снимает лайк, возвращает новое состояние."""
+    deleted, _ = Like.objects.filter(user=user, post_id=post_id).delete()
+    if deleted:
+        like_counter.incr(post_id, -1)
+        return False
+    _, created = Like.objects.get_or_create(user=user, post_id=post_id)
+    if created:
+        like_counter.incr(post_id)
+    return True
+
+
+def likes_count(post):
+    return post.likes_count + like_counter.pending([post.pk]).get(post.pk, 0)
+
+
+class PageLikes:
+    """Лайки страницы постов для user.
+
+    Несброшенные приросты читаются одним обращением к кэшу, отмеченные
+    пользователем посты — одним запросом. Оба чтения ленивые: при
+    попадании в общий фрагментный кэш приросты не читаются, а отметки
+    пользователя выводятся вне фрагмента.
+    """
+
+    def __init__(self, user, posts):
+        self.user = user
+        self.posts = posts
+
+    @cached_property
+    def post_ids(self):
+        return [post.pk for post in self.posts]
+
+    @cached_property
+    def pending(self):
+        return like_counter.pending(self.post_ids)
+
+    @cached_property
+    def liked(self):
+        if not self.user.is_authenticated:
+            return set()
+        return set(Like.objects.filter(
+            user=self.user, post_id__in=self.post_ids
+        ).values_list('post_id', flat=True))
+
+    def count(self, post):
+        return post.likes_count + self.pending.get(post.pk, 0)
+
+    def is_liked(self, post):
+        return post.pk in self.liked
+
+
+def flush_likes():
+    """Пишет накопленные лайки в Post.likes_count, возвращает число постов."""
+    return like_counter.flush()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.tags import backfill_tags
+
+
+class Command(BaseCommand):
+    help = 'Разбирает теги в уже опубликованных постах пачками по id.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        last_pk = 0
+        posts_count = links = 0
+        while True:
+            posts = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('text', 'pub_date')[:options['batch_size']]
+            )
+            if not posts:
+                break
+            links += backfill_tags(posts)
+            posts_count += len(posts)
+            last_pk = posts[-1].pk
+        self.stdout.write(
+            f'Обработано постов: {posts_count}, связей с тегами: {links}'
+        )
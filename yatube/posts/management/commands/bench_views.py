@@ -0,0 +1,235 @@
+import json
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.db import QueryCounter
+from core.stats import percentile
+from posts.models import Follow, Post, User
+from posts.seed import seed_dataset
+
+DEFAULT_BASELINE = os.path.join(
+    settings.BASE_DIR, 'benchmarks', 'views_baseline.json'
+)
+
+
+def build_scenarios(data):
+    """Сценарии: имя, метод, url, данные формы и клиент."""
+    users = data['users']
+    author = User.objects.annotate(
+        posts_count=Count('posts')
+    ).filter(pk__in=[user.pk for user in users]).order_by(
+        '-posts_count'
+    ).first()
+    reader = users[1]
+    target = User.objects.create_user(username='bench_target')
+    Follow.objects.filter(user=reader, author=target).delete()
+    post = Post.objects.filter(pk__in=data['post_ids']).annotate(
+        comments_count=Count('comments')
+    ).order_by('-comments_count').first()
+    group = data['groups'][0]
+
+    guest = Client(REMOTE_ADDR='198.51.100.1')
+    client = Client(REMOTE_ADDR='198.51.100.1')
+    client.force_login(reader)
+    author_client = Client(REMOTE_ADDR='198.51.100.1')
+    author_client.force_login(post.author)
+    return (
+        ('index', 'get', reverse('posts:index'), None, guest),
+        ('group_posts', 'get',
+         reverse('posts:group_posts', args=(group.slug,)), None, guest),
+        ('profile', 'get',
+         reverse('posts:profile', args=(author.username,)), None, client),
+        ('post_detail', 'get',
+         reverse('posts:post_detail', args=(post.pk,)), None, client),
+        ('follow_index', 'get', reverse('posts:follow_index'), None, client),
+        ('post_create', 'get', reverse('posts:post_create'), None, client),
+        ('post_create:submit', 'post', reverse('posts:post_create'),
+         {'text': 'Пост из бенчмарка', 'group': group.pk}, client),
+        ('post_edit', 'get',
+         reverse('posts:post_edit', args=(post.pk,)), None, author_client),
+        ('add_comment', 'post',
+         reverse('posts:add_comment', args=(post.pk,)),
+         {'text': 'Комментарий из бенчмарка'}, client),
+        ('profile_follow', 'get',
+         reverse('posts:profile_follow', args=(target.username,)),
+         None, client),
+        ('profile_unfollow', 'get',
+         reverse('posts:profile_unfollow', args=(target.username,)),
+         None, client),
+        ('api_posts', 'get', reverse('posts:api_posts'), None, guest),
+        ('api_group_posts', 'get',
+         reverse('posts:api_group_posts', args=(group.slug,)), None, guest),
+        ('api_post_detail', 'get',
+         reverse('posts:api_post_detail', args=(post.pk,)), None, client),
+        ('api_follow_posts', 'get',
+         reverse('posts:api_follow_posts'), None, client),
+    )
+
+
+def measure(scenario):
+    _, method, url, payload, client = scenario
+    counter = QueryCounter()
+    cache.clear()
+    with connection.execute_wrapper(counter):
+        start = time.perf_counter()
+        response = getattr(client, method)(url, payload or {})
+        body = (
+            b''.join(response.streaming_content) if response.streaming
+            else response.content
+        )
+        elapsed = time.perf_counter() - start
+    return {
+        'latency': elapsed,
+        'queries': counter.count,
+        'query_time': counter.duration,
+        'bytes': len(body),
+        'status': response.status_code,
+    }
+
+
+def run_benchmarks(scenarios, iterations, warmup):
+    samples = {scenario[0]: [] for scenario in scenarios}
+    for iteration in range(warmup + iterations):
+        for scenario in scenarios:
+            sample = measure(scenario)
+            if iteration >= warmup:
+                samples[scenario[0]].append(sample)
+    results = {}
+    for name, runs in samples.items():
+        latencies = [run['latency'] * 1000 for run in runs]
+        results[name] = {
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'mean_ms': round(statistics.mean(latencies), 3),
+            'queries': max(run['queries'] for run in runs),
+            'query_ms': round(
+                statistics.mean(run['query_time'] for run in runs) * 1000, 3
+            ),
+            'bytes': max(run['bytes'] for run in runs),
+            'status': runs[-1]['status'],
+        }
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Возвращает список регрессий относительно сохранённого baseline."""
+    regressions = []
+    for name, base in baseline.get('results', {}).items():
+        current = results.get(name)
+        if current is None:
+            regressions.append(f'{name}: сценарий пропал из прогона')
+            continue
+        if current['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов {current["queries"]} '
+                f'(было {base["queries"]})'
+            )
+        for metric in ('p50_ms', 'p95_ms'):
+            limit = base[metric] * (1 + tolerance)
+            delta = current[metric] - base[metric]
+            if current[metric] > limit and delta > min_delta_ms:
+                regressions.append(
+                    f'{name}: {metric} {current[metric]:.1f} мс '
+                    f'(было {base[metric]:.1f} мс)'
+                )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк страниц приложения posts на большом наборе данных. '
+        'Данные создаются в транзакции и откатываются после прогона.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=20)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--output', help='Куда записать результаты в формате JSON.'
+        )
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Сохранить результаты прогона как новый baseline.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый относительный рост задержки.'
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=2.0,
+            help='Рост задержки меньше этого значения не считается '
+                 'регрессией.'
+        )
+
+    def handle(self, *args, **options):
+        with override_settings(DEBUG=False), transaction.atomic():
+            data = seed_dataset(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows_per_user=options['follows'],
+            )
+            scenarios = build_scenarios(data)
+            results = run_benchmarks(
+                scenarios, options['iterations'], options['warmup']
+            )
+            transaction.set_rollback(True)
+        cache.clear()
+        report = {
+            'dataset': {
+                key: options[key]
+                for key in ('users', 'groups', 'posts', 'comments', 'follows')
+            },
+            'iterations': options['iterations'],
+            'results': results,
+        }
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<20} p50={result["p50_ms"]:>8.2f}ms '
+                f'p95={result["p95_ms"]:>8.2f}ms '
+                f'queries={result["queries"]:>3} '
+                f'query={result["query_ms"]:>7.2f}ms '
+                f'bytes={result["bytes"]}'
+            )
+        if options['output']:
+            self.write_json(options['output'], report)
+        if options['save_baseline']:
+            self.write_json(options['baseline'], report)
+            self.stdout.write(f'Baseline сохранён в {options["baseline"]}')
+            return
+        if not os.path.exists(options['baseline']):
+            self.stdout.write('Baseline не найден, сравнение пропущено.')
+            return
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(
+            results, baseline, options['tolerance'], options['min_delta_ms']
+        )
+        if regressions:
+            raise CommandError(
+                'Обнаружены регрессии:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий не обнаружено.'))
+
+    def write_json(self, path, report):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
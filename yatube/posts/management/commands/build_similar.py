@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.similar import rebuild_similar, update_similar
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает похожие посты по TF-IDF.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Добавить только новые посты к сохранённому индексу.',
+        )
+
+    def handle(self, *args, **options):
+        if options['incremental']:
+            count = update_similar()
+        else:
+            count = rebuild_similar()
+        self.stdout.write(f'Обработано постов: {count}')
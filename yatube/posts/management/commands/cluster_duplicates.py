@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts.duplicates import duplicate_clusters, index_missing
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Индексирует посты без MinHash-подписи и выводит группы почти '
+        'одинаковых постов для модерации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-size', type=int, default=2)
+        parser.add_argument('--output', help='Записать группы в JSON-файл.')
+
+    def handle(self, *args, **options):
+        indexed = index_missing()
+        if indexed:
+            self.stdout.write(f'Проиндексировано постов: {indexed}')
+        clusters = duplicate_clusters(min_size=options['min_size'])
+        for cluster in clusters:
+            sample = Post.objects.filter(pk=cluster[0]).values_list(
+                'text', flat=True
+            ).first() or ''
+            self.stdout.write(
+                f'{len(cluster):>6} постов: {sample[:60]!r} '
+                f'id={",".join(map(str, cluster[:20]))}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(clusters, file)
+        self.stdout.write(f'Групп дубликатов: {len(clusters)}')
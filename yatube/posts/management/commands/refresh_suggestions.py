@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import refresh_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «кого читать» по графу подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int)
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        created = refresh_suggestions(
+            top_k=options['top_k'], chunk_size=options['chunk_size']
+        )
+        self.stdout.write(f'Рекомендаций записано: {created}')
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет готовый HTML текста и анонса у постов пачками по id.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать все посты, а не только незаполненные.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('text')
+        if not options['all']:
+            posts = posts.filter(text_html='')
+        last_pk = 0
+        rendered = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk)
+                .order_by('pk')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            for post in batch:
+                post.render()
+            Post.objects.bulk_update(batch, ('text_html', 'excerpt_html'))
+            rendered += len(batch)
+            last_pk = batch[-1].pk
+        self.stdout.write(f'Обработано постов: {rendered}')
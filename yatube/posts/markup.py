@@ -0,0 +1,40 @@
+"""Разметка текста поста: ссылки на теги, абзацы и анонс.
+
+Готовый HTML хранится в Post.text_html и Post.excerpt_html и
+пересчитывается при сохранении поста, поэтому шаблоны не разбирают
+текст на каждом рендере.
+"""
+import re
+
+from django.urls import reverse
+from django.utils.html import escape, format_html, linebreaks
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+TAG_RE = re.compile(r'(?<![\w#@&])([#@])(\w{1,100})')
+TAG_URLS = {'#': 'posts:tag', '@': 'posts:mention'}
+EXCERPT_WORDS = 30
+
+
+def linkify(text):
+    """Экранирует текст и превращает теги в ссылки."""
+    parts = []
+    position = 0
+    for match in TAG_RE.finditer(text):
+        kind, name = match.groups()
+        parts.append(escape(text[position:match.start()]))
+        parts.append(format_html(
+            '<a href="{}">{}{}</a>',
+            reverse(TAG_URLS[kind], args=(name.lower(),)), kind, name,
+        ))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts))
+
+
+def render_html(text):
+    return linebreaks(linkify(text))
+
+
+def render_excerpt(text):
+    return linebreaks(linkify(Truncator(text).words(EXCERPT_WORDS)))
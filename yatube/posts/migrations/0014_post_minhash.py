@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_similar_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSignature',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('minhash', models.BinaryField(verbose_name='MinHash-подпись')),
+            ],
+            options={
+                'verbose_name': 'подпись поста',
+                'verbose_name_plural': 'Подписи постов',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostBand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True, verbose_name='Корзина LSH')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'корзину LSH',
+                'verbose_name_plural': 'Корзины LSH',
+            },
+        ),
+    ]
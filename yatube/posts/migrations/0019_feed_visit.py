@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_likes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedVisit',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_seen', models.DateTimeField(verbose_name='Последний просмотр ленты')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='feed_visit', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'просмотр ленты',
+                'verbose_name_plural': 'Просмотры ленты',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_feed_visit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digestrun',
+            name='finished',
+            field=models.BooleanField(default=True, verbose_name='Завершена'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='digestrun',
+            name='finished',
+            field=models.BooleanField(default=False, verbose_name='Завершена'),
+        ),
+        migrations.AddField(
+            model_name='digestrun',
+            name='last_recipient_id',
+            field=models.PositiveIntegerField(default=0, verbose_name='Последний получатель'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+from posts.markup import render_excerpt, render_html
+
+BATCH_SIZE = 500
+
+
+def render_posts(apps, schema_editor):
+    """HTML для постов, созданных до 0016 или в обход save()."""
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.filter(text_html='').only('text')
+    last_pk = 0
+    while True:
+        batch = list(
+            posts.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for post in batch:
+            post.text_html = render_html(post.text)
+            post.excerpt_html = render_excerpt(post.text)
+        Post.objects.bulk_update(batch, ('text_html', 'excerpt_html'))
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_digest_run_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
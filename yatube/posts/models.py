@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .markup import render_excerpt, render_html
+
 User = get_user_model()
 
 
@@ -17,6 +19,21 @@ class Group(models.Model):
         return self.title
 
 
+# Поля, которые выводит posts/includes/article.html.
+LISTING_FIELDS = (
+    'pub_date', 'image', 'excerpt_html', 'likes_count',
+    'author', 'author__username',
+    'author__first_name', 'author__last_name',
+    'group', 'group__title', 'group__slug',
+)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Только поля, которые выводит posts/includes/article.html."""
+        return self.select_related('author', 'group').only(*LISTING_FIELDS)
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -46,6 +63,24 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    trending_score = models.FloatField(
+        'Рейтинг обсуждения',
+        default=0,
+        db_index=True,
+        editable=False,
+    )
+    views = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False
+    )
+    likes_count = models.PositiveIntegerField(
+        'Лайки', default=0, editable=False
+    )
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    excerpt_html = models.TextField(
+        'HTML анонса', blank=True, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
@@ -55,6 +90,16 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def render(self):
+        """Пересчитывает text_html и excerpt_html по тексту."""
+        self.text_html = render_html(self.text)
+        self.excerpt_html = render_excerpt(self.text)
+
+    def save(self, *args, **kwargs):
+        if 'text' not in self.get_deferred_fields():
+            self.render()
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -113,3 +158,240 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
+
+
+class Like(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='likes',
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='likes',
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'лайк'
+        verbose_name_plural = 'Лайки'
+        constraints = [
+            models.UniqueConstraint(name='unique_like',
+                                    fields=['user', 'post']),
+        ]
+
+    def __str__(self):
+        return f'{self.user} → {self.post_id}'
+
+
+class FeedVisit(models.Model):
+    user = models.OneToOneField(
+        User,
+        related_name='feed_visit',
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+    )
+    last_seen = models.DateTimeField('Последний просмотр ленты')
+
+    class Meta:
+        verbose_name = 'просмотр ленты'
+        verbose_name_plural = 'Просмотры ленты'
+
+    def __str__(self):
+        return f'{self.user}: {self.last_seen}'
+
+
+class Notification(models.Model):
+    recipient = models.ForeignKey(
+        User,
+        related_name='notifications',
+        verbose_name='Получатель',
+        on_delete=models.CASCADE,
+    )
+    posts_count = models.PositiveIntegerField('Новых постов')
+    body = models.TextField('Текст дайджеста')
+    is_read = models.BooleanField('Прочитано', default=False)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'уведомление'
+        verbose_name_plural = 'Уведомления'
+        indexes = [
+            models.Index(fields=['recipient', 'is_read']),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.posts_count} новых постов'
+
+
+class DigestRun(models.Model):
+    window_start = models.DateTimeField('Начало окна')
+    window_end = models.DateTimeField('Конец окна', db_index=True)
+    recipients = models.PositiveIntegerField('Получателей', default=0)
+    last_recipient_id = models.PositiveIntegerField(
+        'Последний получатель', default=0
+    )
+    finished = models.BooleanField('Завершена', default=False)
+
+    class Meta:
+        ordering = ('-window_end',)
+        verbose_name = 'рассылку дайджестов'
+        verbose_name_plural = 'Рассылки дайджестов'
+
+    def __str__(self):
+        return f'{self.window_start} — {self.window_end}'
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',
+        on_delete=models.CASCADE,
+    )
+    mutual = models.PositiveIntegerField('Общих подписок')
+    score = models.FloatField('Рейтинг')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'рекомендацию'
+        verbose_name_plural = 'Рекомендации авторов'
+        constraints = [
+            models.UniqueConstraint(name='unique_suggestion',
+                                    fields=['user', 'author']),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+
+    def __str__(self):
+        return f'{self.user} → {self.author}'
+
+
+class SimilarPost(models.Model):
+    post = models.ForeignKey(
+        Post,
+        related_name='similar',
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+    )
+    similar = models.ForeignKey(
+        Post,
+        related_name='+',
+        verbose_name='Похожий пост',
+        on_delete=models.CASCADE,
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'похожий пост'
+        verbose_name_plural = 'Похожие посты'
+        constraints = [
+            models.UniqueConstraint(name='unique_similar_post',
+                                    fields=['post', 'similar']),
+        ]
+        indexes = [
+            models.Index(fields=['post', '-score']),
+        ]
+
+    def __str__(self):
+        return f'{self.post} ~ {self.similar}'
+
+
+class PostSignature(models.Model):
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+    )
+    minhash = models.BinaryField('MinHash-подпись')
+
+    class Meta:
+        verbose_name = 'подпись поста'
+        verbose_name_plural = 'Подписи постов'
+
+    def __str__(self):
+        return f'Подпись поста {self.post_id}'
+
+
+class PostBand(models.Model):
+    post = models.ForeignKey(
+        Post,
+        related_name='bands',
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+    )
+    key = models.BigIntegerField('Корзина LSH', db_index=True)
+
+    class Meta:
+        verbose_name = 'корзину LSH'
+        verbose_name_plural = 'Корзины LSH'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.key}'
+
+
+class Tag(models.Model):
+    HASHTAG = '#'
+    MENTION = '@'
+    KIND_CHOICES = (
+        (HASHTAG, 'Хэштег'),
+        (MENTION, 'Упоминание'),
+    )
+
+    kind = models.CharField('Тип', max_length=1, choices=KIND_CHOICES)
+    name = models.CharField('Название', max_length=100)
+
+    class Meta:
+        verbose_name = 'тег'
+        verbose_name_plural = 'Теги'
+        constraints = [
+            models.UniqueConstraint(name='unique_tag',
+                                    fields=['kind', 'name']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind}{self.name}'
+
+
+class PostTag(models.Model):
+    post = models.ForeignKey(
+        Post,
+        related_name='post_tags',
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+    )
+    tag = models.ForeignKey(
+        Tag,
+        related_name='post_tags',
+        verbose_name='Тег',
+        on_delete=models.CASCADE,
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        verbose_name = 'тег поста'
+        verbose_name_plural = 'Теги постов'
+        constraints = [
+            models.UniqueConstraint(name='unique_post_tag',
+                                    fields=['post', 'tag']),
+        ]
+        indexes = [
+            models.Index(fields=['tag', '-pub_date', '-post']),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.tag_id}'
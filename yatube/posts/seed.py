@@ -0,0 +1,101 @@
+"""Наполнение базы большим набором данных для бенчмарков и нагрузки."""
+import random
+
+from .models import Comment, Follow, Group, Post, User
+
+SEED_PREFIX = 'seed'
+BATCH_SIZE = 500
+WORDS = (
+    'yatube пост текст группа автор подписка комментарий лента картинка '
+    'новости утро вечер город море книга кино музыка друзья работа отпуск '
+    'погода кофе спорт дорога планы мысли идея проект код тест'
+).split()
+
+
+def seed_username(number):
+    return f'{SEED_PREFIX}_user_{number}'
+
+
+def seed_text(rnd, words=40):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words))
+
+
+def seed_post(rnd, user_objs, group_objs):
+    post = Post(
+        author=rnd.choice(user_objs),
+        group=rnd.choice(group_objs + [None]),
+        text=seed_text(rnd, rnd.randint(10, 120)),
+    )
+    # bulk_create не вызывает save(), HTML считается заранее.
+    post.render()
+    return post
+
+
+def seed_dataset(users=200, groups=10, posts=5000, comments=10000,
+                 follows_per_user=20, random_seed=0):
+    """Создаёт пользователей, группы, посты, комментарии и подписки.
+
+    Данные создаются пачками через bulk_create, поэтому даже десятки
+    тысяч постов заполняются за секунды. Возвращает словарь с созданными
+    пользователями и группами и id постов.
+    """
+    rnd = random.Random(random_seed)
+    user_objs = User.objects.bulk_create(
+        User(
+            username=seed_username(number),
+            first_name='Пользователь',
+            last_name=str(number),
+        )
+        for number in range(users)
+    )
+    user_objs = list(User.objects.filter(
+        username__in=[user.username for user in user_objs]
+    ).order_by('pk'))
+    Group.objects.bulk_create(
+        Group(
+            title=f'Группа {number}',
+            slug=f'{SEED_PREFIX}-group-{number}',
+            description=seed_text(rnd, 20),
+        )
+        for number in range(groups)
+    )
+    group_objs = list(Group.objects.filter(
+        slug__startswith=f'{SEED_PREFIX}-group-'
+    ).order_by('pk'))
+    Post.objects.bulk_create(
+        (seed_post(rnd, user_objs, group_objs) for _ in range(posts)),
+        batch_size=BATCH_SIZE,
+    )
+    post_ids = list(Post.objects.filter(
+        author__in=user_objs
+    ).values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                post_id=rnd.choice(post_ids),
+                author=rnd.choice(user_objs),
+                text=seed_text(rnd, rnd.randint(3, 30)),
+            )
+            for _ in range(comments)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    follows = set()
+    for user in user_objs:
+        for author in rnd.sample(
+            user_objs, min(follows_per_user + 1, len(user_objs))
+        ):
+            if author != user:
+                follows.add((user.pk, author.pk))
+    Follow.objects.bulk_create(
+        (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in sorted(follows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return {
+        'users': user_objs,
+        'groups': group_objs,
+        'post_ids': post_ids,
+    }
@@ -0,0 +1,277 @@
+"""Похожие посты по TF-IDF.
+
+Полный пересчёт читает посты пачками дважды: сначала считает частоты
+слов для словаря и IDF, затем векторизует. Векторы хранятся разреженной
+матрицей SciPy с нормированными строками, поэтому косинус — это
+произведение матриц. Соседи считаются пачками строк, от каждой пачки
+остаются только лучшие SIMILAR_POSTS_TOP_K на строку; вместе со
+словарём они сохраняются в SIMILAR_POSTS_INDEX. Инкрементальный режим
+векторизует только новые посты по сохранённому словарю и сливает их с
+уже найденными соседями; IDF обновляется при следующем полном пересчёте.
+"""
+import os
+import re
+import tempfile
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from .models import Post, SimilarPost
+from .notifications import chunked
+
+TOKEN_RE = re.compile(r'\w{3,}')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def iter_documents(queryset, chunk_size):
+    """Пачки (id, списки токенов) постов queryset в порядке id."""
+    rows = queryset.order_by('pk').values_list('pk', 'text').iterator(
+        chunk_size=chunk_size
+    )
+    for chunk in chunked(rows, chunk_size):
+        yield [pk for pk, _ in chunk], [tokenize(text) for _, text in chunk]
+
+
+def count_frequency(documents, frequency):
+    """Добавляет в frequency число документов с каждым словом."""
+    for tokens in documents:
+        for token in set(tokens):
+            frequency[token] = frequency.get(token, 0) + 1
+
+
+def build_vocabulary(frequency, total):
+    """Словарь {слово: столбец} и IDF по частотам слов в total документах."""
+    max_df = settings.SIMILAR_POSTS_MAX_DF * total
+    words = sorted(
+        word for word, count in frequency.items()
+        if settings.SIMILAR_POSTS_MIN_DF <= count <= max_df
+    )
+    counts = np.array([frequency[word] for word in words], dtype=np.float64)
+    idf = np.log((1 + total) / (1 + counts)) + 1
+    return {word: column for column, word in enumerate(words)}, idf
+
+
+def vectorize(documents, vocabulary, idf):
+    """CSR-матрица TF-IDF с единичными строками; чужие слова пропускаются."""
+    indptr = [0]
+    indices = []
+    data = []
+    for tokens in documents:
+        columns = {}
+        for token in tokens:
+            column = vocabulary.get(token)
+            if column is not None:
+                columns[column] = columns.get(column, 0) + 1
+        indices.extend(columns)
+        data.extend(columns.values())
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix(
+        (np.array(data, dtype=np.float64), indices, indptr),
+        shape=(len(documents), len(idf)),
+    )
+    matrix.data = 1 + np.log(matrix.data)
+    matrix = matrix.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return (sparse.diags(1 / norms) @ matrix).tocsr()
+
+
+def rank_within_groups(groups):
+    """Порядковый номер элемента внутри серии равных соседних groups."""
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    sizes = np.diff(np.r_[starts, len(groups)])
+    return np.arange(len(groups)) - np.repeat(starts, sizes)
+
+
+def select_top(rows, columns, scores, shape):
+    """Лучшие k кандидатов на строку: массивы соседей и оценок shape."""
+    order = np.lexsort((-scores, rows))
+    rows, columns, scores = rows[order], columns[order], scores[order]
+    rank = rank_within_groups(rows)
+    keep = rank < shape[1]
+    neighbours = np.full(shape, -1, dtype=np.int64)
+    top_scores = np.zeros(shape, dtype=np.float64)
+    neighbours[rows[keep], rank[keep]] = columns[keep]
+    top_scores[rows[keep], rank[keep]] = scores[keep]
+    return neighbours, top_scores
+
+
+def candidates(queries, matrix, offset, column_offset=0):
+    """Лучшие (строка, столбец, косинус) для строк queries и matrix.
+
+    Строки queries имеют номера offset+i, строки matrix —
+    column_offset+j. Отбор лучших идёт в каждой пачке, поэтому в памяти
+    не больше SIMILAR_POSTS_TOP_K пар на строку.
+    """
+    rows, columns, scores = [], [], []
+    chunk_size = settings.SIMILAR_POSTS_CHUNK_SIZE
+    for start in range(0, queries.shape[0], chunk_size):
+        chunk = queries[start:start + chunk_size]
+        product = (chunk @ matrix.T).tocoo()
+        product_columns = product.col + column_offset
+        keep = (
+            (product.data >= settings.SIMILAR_POSTS_MIN_SCORE)
+            & (product_columns != product.row + offset + start)
+        )
+        neighbours, top_scores = select_top(
+            product.row[keep], product_columns[keep], product.data[keep],
+            (chunk.shape[0], settings.SIMILAR_POSTS_TOP_K),
+        )
+        chunk_rows, ranks = np.nonzero(neighbours >= 0)
+        rows.append(chunk_rows + offset + start)
+        columns.append(neighbours[chunk_rows, ranks])
+        scores.append(top_scores[chunk_rows, ranks])
+    if not rows:
+        return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                np.zeros(0))
+    return (np.concatenate(rows), np.concatenate(columns),
+            np.concatenate(scores))
+
+
+def save_index(path, ids, vocabulary, idf, matrix, neighbours, scores):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(suffix='.npz', dir=directory)
+    try:
+        with os.fdopen(handle, 'wb') as tmp_file:
+            np.savez_compressed(
+                tmp_file,
+                ids=ids,
+                words=np.array(
+                    sorted(vocabulary, key=vocabulary.get), dtype=str
+                ),
+                idf=idf,
+                data=matrix.data,
+                indices=matrix.indices,
+                indptr=matrix.indptr,
+                neighbours=neighbours,
+                scores=scores,
+            )
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def load_index(path):
+    with np.load(path, allow_pickle=False) as stored:
+        words = stored['words'].tolist()
+        idf = stored['idf']
+        matrix = sparse.csr_matrix(
+            (stored['data'], stored['indices'], stored['indptr']),
+            shape=(len(stored['ids']), len(idf)),
+        )
+        return {
+            'ids': stored['ids'],
+            'vocabulary': {word: column for column, word in enumerate(words)},
+            'idf': idf,
+            'matrix': matrix,
+            'neighbours': stored['neighbours'],
+            'scores': stored['scores'],
+        }
+
+
+def write_neighbours(ids, neighbours, scores, rows):
+    """Заменяет SimilarPost для постов с номерами rows."""
+    existing = set(Post.objects.values_list('pk', flat=True).iterator())
+    objects = [
+        SimilarPost(
+            post_id=int(ids[row]), similar_id=int(ids[column]),
+            score=float(score),
+        )
+        for row in rows
+        for column, score in zip(neighbours[row], scores[row])
+        if column >= 0 and ids[row] in existing and ids[column] in existing
+    ]
+    post_ids = [int(ids[row]) for row in rows]
+    with transaction.atomic():
+        for start in range(0, len(post_ids), 500):
+            SimilarPost.objects.filter(
+                post_id__in=post_ids[start:start + 500]
+            ).delete()
+        SimilarPost.objects.bulk_create(objects)
+
+
+def rebuild_similar(path=None):
+    """Полный пересчёт, возвращает число обработанных постов."""
+    path = path or settings.SIMILAR_POSTS_INDEX
+    chunk_size = settings.SIMILAR_POSTS_CHUNK_SIZE
+    frequency = {}
+    total = last_id = 0
+    for chunk_ids, documents in iter_documents(Post.objects, chunk_size):
+        count_frequency(documents, frequency)
+        total += len(documents)
+        last_id = chunk_ids[-1]
+    vocabulary, idf = build_vocabulary(frequency, total)
+    ids = []
+    matrices = [vectorize([], vocabulary, idf)]
+    posts = Post.objects.filter(pk__lte=last_id)
+    for chunk_ids, documents in iter_documents(posts, chunk_size):
+        ids.extend(chunk_ids)
+        matrices.append(vectorize(documents, vocabulary, idf))
+    ids = np.array(ids, dtype=np.int64)
+    matrix = sparse.vstack(matrices).tocsr()
+    shape = (len(ids), settings.SIMILAR_POSTS_TOP_K)
+    neighbours, scores = select_top(*candidates(matrix, matrix, 0), shape)
+    save_index(path, ids, vocabulary, idf, matrix, neighbours, scores)
+    write_neighbours(ids, neighbours, scores, range(len(ids)))
+    return len(ids)
+
+
+def update_similar(path=None):
+    """Добавляет в индекс новые посты, возвращает их число."""
+    path = path or settings.SIMILAR_POSTS_INDEX
+    if not os.path.exists(path):
+        return rebuild_similar(path)
+    index = load_index(path)
+    last_id = int(index['ids'].max()) if len(index['ids']) else 0
+    posts = list(
+        Post.objects.filter(pk__gt=last_id).order_by('pk')
+        .values_list('pk', 'text')
+    )
+    if not posts:
+        return 0
+    old_count = len(index['ids'])
+    ids = np.concatenate(
+        [index['ids'], np.array([pk for pk, _ in posts], dtype=np.int64)]
+    )
+    new_matrix = vectorize(
+        [tokenize(text) for _, text in posts],
+        index['vocabulary'], index['idf'],
+    )
+    matrix = sparse.vstack([index['matrix'], new_matrix]).tocsr()
+    new_rows, new_columns, new_scores = candidates(
+        new_matrix, matrix, old_count
+    )
+    reverse_rows, reverse_columns, reverse_scores = candidates(
+        index['matrix'], new_matrix, 0, column_offset=old_count
+    )
+    old_rows, old_columns = np.nonzero(index['neighbours'] >= 0)
+    rows = np.concatenate([old_rows, new_rows, reverse_rows])
+    columns = np.concatenate([
+        index['neighbours'][old_rows, old_columns],
+        new_columns, reverse_columns,
+    ])
+    scores = np.concatenate([
+        index['scores'][old_rows, old_columns],
+        new_scores, reverse_scores,
+    ])
+    shape = (len(ids), settings.SIMILAR_POSTS_TOP_K)
+    neighbours, top_scores = select_top(rows, columns, scores, shape)
+    changed = np.flatnonzero(
+        (neighbours[:old_count] != index['neighbours']).any(axis=1)
+    )
+    save_index(
+        path, ids, index['vocabulary'], index['idf'], matrix,
+        neighbours, top_scores,
+    )
+    write_neighbours(
+        ids, neighbours, top_scores,
+        np.concatenate([changed, np.arange(old_count, len(ids))]),
+    )
+    return len(posts)
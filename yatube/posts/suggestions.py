@@ -0,0 +1,116 @@
+"""Рекомендации «кого читать» по графу подписок.
+
+Граф подписок загружается в CSR-массивы NumPy (indptr, indices) по
+плотным номерам пользователей. Кандидаты для пользователя — авторы, на
+которых подписаны его подписки; рейтинг складывается из числа таких
+общих подписок и недавней активности автора. Расчёт идёт пачками
+пользователей вне транзакции; короткая транзакция на пачку заменяет
+рекомендации пользователей с id в её диапазоне, поэтому запись в базу
+не блокируется на время всего пересчёта.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Follow, FollowSuggestion, Post
+
+
+def follow_graph():
+    """(ids, indptr, indices): CSR-матрица подписок и id пользователей."""
+    edges = np.fromiter(
+        (value for pair in Follow.objects.values_list('user_id', 'author_id')
+         .iterator() for value in pair),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    ids = np.unique(edges)
+    users = np.searchsorted(ids, edges[:, 0])
+    authors = np.searchsorted(ids, edges[:, 1])
+    order = np.lexsort((authors, users))
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(users, minlength=len(ids)), out=indptr[1:])
+    return ids, indptr, authors[order]
+
+
+def author_activity(ids, days):
+    """Число постов каждого пользователя из ids за последние days дней."""
+    activity = np.zeros(len(ids), dtype=np.float64)
+    border = timezone.now() - timedelta(days=days)
+    counts = Post.objects.filter(pub_date__gte=border).values_list(
+        'author_id'
+    ).annotate(posts=Count('id')).order_by()
+    for author_id, posts in counts:
+        position = np.searchsorted(ids, author_id)
+        if position < len(ids) and ids[position] == author_id:
+            activity[position] = posts
+    return activity
+
+
+def neighbours(indptr, indices, rows):
+    """Соседи rows одним массивом и номер строки rows для каждого."""
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    owners = np.repeat(np.arange(len(rows)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(
+        np.cumsum(counts) - counts, counts
+    )
+    return owners, indices[np.repeat(starts, counts) + offsets]
+
+
+def top_candidates(indptr, indices, activity, rows, top_k, weight):
+    """(user, author, mutual, score) лучших кандидатов для пачки rows."""
+    size = np.int64(len(indptr) - 1)
+    owners, middle = neighbours(indptr, indices, rows)
+    followed = rows[owners] * size + middle
+    hops, candidates = neighbours(indptr, indices, middle)
+    users = rows[owners[hops]]
+    keys = users * size + candidates
+    keys = keys[(candidates != users) & ~np.isin(keys, followed)]
+    keys, mutual = np.unique(keys, return_counts=True)
+    users, candidates = keys // size, keys % size
+    scores = mutual + weight * np.log1p(activity[candidates])
+    order = np.lexsort((-scores, users))
+    users, candidates = users[order], candidates[order]
+    mutual, scores = mutual[order], scores[order]
+    group_starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(users)])
+    rank = np.arange(len(users)) - np.repeat(group_starts, group_sizes)
+    keep = rank < top_k
+    return users[keep], candidates[keep], mutual[keep], scores[keep]
+
+
+def refresh_suggestions(top_k=None, chunk_size=None):
+    """Пересчитывает рекомендации для всех, возвращает число записей."""
+    top_k = top_k or settings.SUGGESTIONS_TOP_K
+    chunk_size = chunk_size or settings.SUGGESTIONS_CHUNK_SIZE
+    ids, indptr, indices = follow_graph()
+    activity = author_activity(ids, settings.SUGGESTIONS_ACTIVITY_DAYS)
+    created = 0
+    last_id = 0
+    for start in range(0, len(ids), chunk_size):
+        rows = np.arange(start, min(start + chunk_size, len(ids)))
+        users, authors, mutual, scores = top_candidates(
+            indptr, indices, activity, rows, top_k,
+            settings.SUGGESTIONS_ACTIVITY_WEIGHT,
+        )
+        suggestions = [
+            FollowSuggestion(
+                user_id=int(ids[user]), author_id=int(ids[author]),
+                mutual=int(count), score=float(score),
+            )
+            for user, author, count, score
+            in zip(users, authors, mutual, scores)
+        ]
+        upper_id = int(ids[rows[-1]])
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(
+                user_id__gt=last_id, user_id__lte=upper_id
+            ).delete()
+            FollowSuggestion.objects.bulk_create(suggestions)
+        created += len(suggestions)
+        last_id = upper_id
+    FollowSuggestion.objects.filter(user_id__gt=last_id).delete()
+    return created
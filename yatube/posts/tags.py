@@ -0,0 +1,73 @@
+"""Хэштеги и упоминания в тексте поста.
+
+Теги разбираются один раз при сохранении поста и пишутся в Tag и
+PostTag; страница тега читает PostTag по индексу (tag, -pub_date)
+вместо поиска по тексту.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+
+from .markup import TAG_RE
+from .models import PostTag, Tag
+
+MAX_TAGS = 30
+
+
+def extract_tags(text):
+    """Множество пар (тип, имя) из текста, имена в нижнем регистре."""
+    found = []
+    for kind, name in TAG_RE.findall(text):
+        if (kind, name.lower()) not in found:
+            found.append((kind, name.lower()))
+    return found[:MAX_TAGS]
+
+
+def sync_tags(post):
+    """Приводит PostTag поста к тегам из его текста."""
+    parsed = extract_tags(post.text)
+    with transaction.atomic():
+        tag_ids = set()
+        if parsed:
+            Tag.objects.bulk_create(
+                [Tag(kind=kind, name=name) for kind, name in parsed],
+                ignore_conflicts=True,
+            )
+            tag_ids = set(Tag.objects.filter(reduce(or_, (
+                Q(kind=kind, name=name) for kind, name in parsed
+            ))).values_list('pk', flat=True))
+        PostTag.objects.filter(post=post).exclude(tag_id__in=tag_ids).delete()
+        PostTag.objects.bulk_create(
+            [PostTag(post=post, tag_id=tag_id, pub_date=post.pub_date)
+             for tag_id in tag_ids],
+            ignore_conflicts=True,
+        )
+
+
+def backfill_tags(posts):
+    """Добавляет недостающие PostTag для пачки постов разом."""
+    parsed = {post.pk: extract_tags(post.text) for post in posts}
+    pairs = {pair for tags in parsed.values() for pair in tags}
+    if not pairs:
+        return 0
+    Tag.objects.bulk_create(
+        [Tag(kind=kind, name=name) for kind, name in pairs],
+        ignore_conflicts=True,
+    )
+    tag_ids = {}
+    for kind in {kind for kind, _ in pairs}:
+        names = [name for tag_kind, name in pairs if tag_kind == kind]
+        for start in range(0, len(names), 500):
+            tag_ids.update(
+                ((kind, name), pk) for pk, name in Tag.objects.filter(
+                    kind=kind, name__in=names[start:start + 500]
+                ).values_list('pk', 'name')
+            )
+    links = [
+        PostTag(post=post, tag_id=tag_ids[pair], pub_date=post.pub_date)
+        for post in posts for pair in parsed[post.pk]
+    ]
+    PostTag.objects.bulk_create(links, ignore_conflicts=True)
+    return len(links)
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+
+from .feed import bump_unread
+from .models import DigestRun, Post
+from .notifications import build_digests
+from .similar import rebuild_similar, update_similar
+from .suggestions import refresh_suggestions
+from .trending import fold_trending
+
+# Те же размеры, что в шаблонах article.html и post_detail.html.
+THUMBNAILS = (
+    ('500x339', {'crop': 'center', 'upscale': True}),
+    ('600x339', {'crop': 'center', 'upscale': True}),
+)
+
+
+@task('posts.generate_thumbnails')
+def generate_thumbnails(post_id):
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    for geometry, options in THUMBNAILS:
+        get_thumbnail(post.image, geometry, **options)
+
+
+@task('posts.send_digests')
+def send_digests():
+    """Дайджесты за время, прошедшее с предыдущей рассылки.
+
+    Незавершённая рассылка продолжается с сохранённого прогресса.
+    """
+    run = DigestRun.objects.filter(finished=False).first()
+    if run is None:
+        window_end = timezone.now()
+        last_run = DigestRun.objects.first()
+        if last_run is None:
+            window_start = window_end - timedelta(
+                seconds=settings.NOTIFICATION_DIGEST_INTERVAL
+            )
+        else:
+            window_start = last_run.window_end
+        run = DigestRun.objects.create(
+            window_start=window_start, window_end=window_end
+        )
+    build_digests(run)
+    run.finished = True
+    run.save(update_fields=('finished',))
+
+
+@task('posts.refresh_suggestions', max_attempts=2)
+def refresh_follow_suggestions():
+    refresh_suggestions()
+
+
+@task('posts.fold_trending', max_attempts=1)
+def fold_trending_scores():
+    fold_trending()
+
+
+@task('posts.update_similar', max_attempts=2)
+def update_similar_posts():
+    update_similar()
+
+
+@task('posts.rebuild_similar', max_attempts=2)
+def rebuild_similar_posts():
+    rebuild_similar()
+
+
+@task('posts.bump_unread')
+def bump_feed_unread(post_id):
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is not None:
+        bump_unread(author_id)
@@ -0,0 +1,17 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def user_state(user, followed_authors, likes):
+    """Подписки и лайки user на странице для posts/includes/user_state.html.
+
+    Выводятся вне общего для всех фрагментного кэша и отмечаются на
+    странице скриптом.
+    """
+    return {
+        'user_id': user.pk,
+        'followed': sorted(followed_authors or ()),
+        'liked': sorted(likes.liked) if likes else [],
+    }
@@ -0,0 +1,18 @@
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/like_button.html')
+def like_button(post, likes, shared_fragment=False):
+    """Счётчик и кнопка лайка поста по данным PageLikes страницы.
+
+    В общем фрагменте кнопка выводится неотмеченной, отметку ставит
+    posts/includes/user_state.html.
+    """
+    return {
+        'post': post,
+        'count': likes.count(post),
+        'liked': not shared_fragment and likes.is_liked(post),
+        'can_like': likes.user.is_authenticated,
+    }
@@ -0,0 +1,69 @@
+import json
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.counters import drain_all
+from posts.models import Follow, User
+
+
+class FollowApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+        self.follow_url = reverse(
+            'posts:api_profile_follow', args=(self.author.username,)
+        )
+        self.unfollow_url = reverse(
+            'posts:api_profile_unfollow', args=(self.author.username,)
+        )
+
+    def test_follow_returns_counter(self):
+        """Подписка возвращает состояние и число подписчиков"""
+        response = self.auth_client.post(self.follow_url)
+        self.assertEqual(
+            json.loads(response.content),
+            {'following': True, 'followers_count': 1}
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+
+    def test_follow_is_idempotent_and_cheap(self):
+        """Повторная подписка не создаёт дубль и делает одну запись"""
+        self.auth_client.post(self.follow_url)
+        drain_all()
+        with self.assertNumQueries(3):
+            response = self.auth_client.post(self.follow_url)
+        self.assertEqual(json.loads(response.content)['followers_count'], 1)
+
+    def test_unfollow_returns_counter(self):
+        """Отписка удаляет подписку и возвращает счётчик"""
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.auth_client.post(self.unfollow_url)
+        self.assertEqual(
+            json.loads(response.content),
+            {'following': False, 'followers_count': 0}
+        )
+        self.assertFalse(Follow.objects.exists())
+
+    def test_errors(self):
+        """GET, аноним и подписка на себя отклоняются"""
+        self_url = reverse(
+            'posts:api_profile_follow', args=(self.user.username,)
+        )
+        cases = (
+            (self.auth_client.get(self.follow_url), 405),
+            (Client().post(self.follow_url), 401),
+            (self.auth_client.post(self_url), 400),
+        )
+        for response, status in cases:
+            with self.subTest(status=status):
+                self.assertEqual(response.status_code, status)
+        self.assertFalse(Follow.objects.exists())
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts.models import Post
+
+SMALL_DATASET = (
+    '--users', '5', '--groups', '2', '--posts', '30', '--comments', '20',
+    '--follows', '2', '--iterations', '2', '--warmup', '0',
+)
+
+
+class BenchViewsCommandTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp_dir.name, 'result.json')
+        self.baseline = os.path.join(self.tmp_dir.name, 'baseline.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_bench(self, *args):
+        call_command(
+            'bench_views', *SMALL_DATASET, '--output', self.output,
+            '--baseline', self.baseline, *args, stdout=StringIO()
+        )
+        with open(self.output, encoding='utf-8') as file:
+            return json.load(file)
+
+    def test_bench_covers_views_and_rolls_back(self):
+        """Бенчмарк проходит по всем страницам и не оставляет данных"""
+        report = self.run_bench('--save-baseline')
+        for name in ('index', 'group_posts', 'profile', 'post_detail',
+                     'follow_index', 'post_create', 'add_comment',
+                     'profile_follow', 'profile_unfollow', 'api_posts',
+                     'api_post_detail', 'api_follow_posts'):
+            with self.subTest(name=name):
+                self.assertIn(name, report['results'])
+                self.assertGreater(report['results'][name]['queries'], 0)
+        self.assertEqual(report['results']['index']['status'], 200)
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(os.path.exists(self.baseline))
+
+    def test_bench_fails_on_query_regression(self):
+        """Рост числа запросов относительно baseline валит прогон"""
+        report = self.run_bench('--save-baseline')
+        report['results']['index']['queries'] -= 1
+        with open(self.baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file)
+        with self.assertRaises(CommandError):
+            self.run_bench()
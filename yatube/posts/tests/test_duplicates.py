@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.duplicates import (find_duplicates, index_post, signature,
+                              similarity)
+from posts.forms import PostForm
+from posts.models import Post, PostBand, User
+
+SPAM = (
+    'Только сегодня скидки на лучшие часы в интернете, переходите по '
+    'ссылке и заказывайте со скидкой девяносто процентов'
+)
+SPAM_VARIANT = SPAM.replace('сегодня', 'сегодня и завтра')
+OTHER = (
+    'Сегодня гуляли в парке с собакой, погода была отличная и мы '
+    'встретили много знакомых'
+)
+
+
+class DuplicatesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+
+    def create(self, text):
+        post = Post.objects.create(author=self.user, text=text)
+        index_post(post)
+        return post
+
+    def test_signature_estimates_jaccard(self):
+        """Подписи близких текстов совпадают сильнее, чем далёких"""
+        self.assertGreater(
+            similarity(signature(SPAM), signature(SPAM_VARIANT)), 0.6
+        )
+        self.assertLess(similarity(signature(SPAM), signature(OTHER)), 0.2)
+        self.assertIsNone(signature('два слова'))
+
+    def test_find_duplicates_uses_index(self):
+        """Кандидаты ищутся по корзинам LSH одним запросом"""
+        post = self.create(SPAM)
+        self.create(OTHER)
+        self.assertEqual(PostBand.objects.filter(post=post).count(), 16)
+        with self.assertNumQueries(1):
+            found = find_duplicates(SPAM + '!')
+        self.assertEqual(found, [post.pk])
+        self.assertEqual(find_duplicates(SPAM, exclude=post.pk), [])
+
+    def test_form_rejects_near_duplicate(self):
+        """Форма не пропускает почти такой же текст, короткие — пропускает"""
+        self.create(SPAM)
+        self.create('Привет всем')
+        self.assertFalse(PostForm({'text': SPAM}).is_valid())
+        self.assertTrue(PostForm({'text': 'Привет всем'}).is_valid())
+        self.assertTrue(PostForm({'text': OTHER}).is_valid())
+
+    def test_edit_does_not_match_itself(self):
+        """Редактирование поста не считается дубликатом его самого"""
+        post = self.create(SPAM)
+        form = PostForm({'text': SPAM + ' Ура'}, instance=post)
+        self.assertTrue(form.is_valid())
+
+    def test_create_view_indexes_post(self):
+        """Новый пост сразу попадает в индекс"""
+        self.auth_client.post(reverse('posts:post_create'), {'text': SPAM})
+        response = self.auth_client.post(
+            reverse('posts:post_create'), {'text': SPAM}
+        )
+        self.assertFormError(
+            response, 'form', 'text', 'Почти такой же текст уже опубликован.'
+        )
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_cluster_command_groups_copies(self):
+        """Команда индексирует старые посты и собирает их в группы"""
+        copies = Post.objects.bulk_create(
+            Post(author=self.user, text=f'{SPAM} {number}')
+            for number in range(3)
+        )
+        Post.objects.create(author=self.user, text=OTHER)
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'clusters.json')
+            call_command('cluster_duplicates', '--output', path, stdout=out)
+            with open(path, encoding='utf-8') as file:
+                clusters = json.load(file)
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(len(clusters[0]), len(copies))
+        self.assertIn('Проиндексировано постов: 4', out.getvalue())
@@ -0,0 +1,109 @@
+import json
+
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.counters import drain_all
+from core.tasks import run_pending
+from posts.feed import unread_key
+from posts.models import FeedVisit, Follow, Post, User
+
+
+class FeedUnreadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.unread_url = reverse('posts:api_feed_unread')
+
+    def unread(self):
+        response = self.auth_client.get(self.unread_url)
+        return json.loads(response.content)['unread']
+
+    def test_visit_resets_counter_and_marks_new_posts(self):
+        """Просмотр ленты обнуляет счётчик, новые посты помечены"""
+        Post.objects.create(author=self.author, text='Первый')
+        self.assertEqual(self.unread(), 1)
+        response = self.auth_client.get(reverse('posts:follow_index'))
+        self.assertIsNone(response.context['last_seen'])
+        self.assertEqual(self.unread(), 0)
+        self.assertTrue(FeedVisit.objects.filter(user=self.user).exists())
+        Post.objects.create(author=self.author, text='Второй')
+        caches['shared'].delete(unread_key(self.user.pk))
+        self.assertEqual(self.unread(), 1)
+        response = self.auth_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Новое', count=1)
+
+    def test_new_post_bumps_cached_counter(self):
+        """Новый пост увеличивает закэшированный счётчик подписчика"""
+        self.assertEqual(self.unread(), 0)
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'}
+        )
+        self.assertEqual(self.unread(), 0)
+        run_pending()
+        self.assertEqual(self.unread(), 1)
+
+    def test_polling_reads_only_cache(self):
+        """Опрос счётчика после первого чтения не выполняет SQL"""
+        Post.objects.create(author=self.author, text='Пост')
+        self.unread()
+        drain_all()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread(), 1)
+
+    @override_settings(FEED_UNREAD_MAX=2)
+    def test_counter_is_capped(self):
+        """Счётчик не превышает FEED_UNREAD_MAX"""
+        for number in range(4):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        self.assertEqual(self.unread(), 2)
+
+    def test_follow_change_resets_counter(self):
+        """После отписки счётчик пересчитывается"""
+        Post.objects.create(author=self.author, text='Пост')
+        self.assertEqual(self.unread(), 1)
+        self.auth_client.post(reverse(
+            'posts:api_profile_unfollow', args=(self.author.username,)
+        ))
+        self.assertEqual(self.unread(), 0)
+
+    def test_follow_change_writes_database_once(self):
+        """Отписка пишет в базу один раз, счётчик сбрасывается в кэше"""
+        self.assertEqual(self.unread(), 0)
+        drain_all()
+        with CaptureQueriesContext(connection) as context:
+            self.auth_client.post(reverse(
+                'posts:api_profile_unfollow', args=(self.author.username,)
+            ))
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(len(writes), 1)
+        self.assertIsNone(caches['shared'].get(unread_key(self.user.pk)))
+
+    def test_header_shows_counter(self):
+        """Шапка показывает число новых постов"""
+        Post.objects.create(author=self.author, text='Пост')
+        response = self.auth_client.get(reverse('about:author'))
+        self.assertContains(response, 'id="feed-unread"')
+        self.assertEqual(response.context['feed_unread'], 1)
+
+    def test_anonymous_gets_401(self):
+        """Аноним не получает счётчик"""
+        response = self.client.get(self.unread_url)
+        self.assertEqual(response.status_code, 401)
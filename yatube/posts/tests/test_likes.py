@@ -0,0 +1,91 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.likes import PageLikes, flush_likes, like_counter
+from posts.models import Like, Post, User
+
+
+class LikesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(author=cls.other, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        like_counter.drain()
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+        self.url = reverse('posts:api_post_like', args=(self.post.pk,))
+
+    def test_toggle_like(self):
+        """Повторный запрос снимает лайк, счётчик виден до сброса"""
+        response = self.auth_client.post(self.url)
+        self.assertEqual(
+            json.loads(response.content), {'liked': True, 'likes_count': 1}
+        )
+        self.assertTrue(
+            Like.objects.filter(user=self.user, post=self.post).exists()
+        )
+        response = self.auth_client.post(self.url)
+        self.assertEqual(
+            json.loads(response.content), {'liked': False, 'likes_count': 0}
+        )
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).likes_count, 0
+        )
+
+    def test_anonymous_gets_401(self):
+        """Аноним получает 401 и лайк не ставится"""
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Like.objects.exists())
+
+    def test_flush_writes_net_delta(self):
+        """Сброс пишет суммарный прирост с учётом снятых лайков"""
+        other_client = Client()
+        other_client.force_login(self.other)
+        self.auth_client.post(self.url)
+        other_client.post(self.url)
+        other_client.post(self.url)
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_likes(), 1)
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).likes_count, 1
+        )
+        self.assertEqual(like_counter.pending([self.post.pk]), {})
+
+    def test_flush_clamps_negative_total(self):
+        """Отрицательный итог не мешает сбросу остальных постов"""
+        other = Post.objects.create(author=self.other, text='Другой')
+        like_counter.incr(self.post.pk, -1)
+        like_counter.incr(other.pk, 3)
+        self.assertEqual(flush_likes(), 2)
+        self.assertEqual(
+            dict(Post.objects.values_list('pk', 'likes_count')),
+            {self.post.pk: 0, other.pk: 3},
+        )
+        self.assertEqual(like_counter.pending([self.post.pk, other.pk]), {})
+
+    def test_page_likes_marks_liked_posts(self):
+        """Лента отмечает посты, которые лайкнул пользователь"""
+        second = Post.objects.create(author=self.other, text='Второй')
+        Like.objects.create(user=self.user, post=self.post)
+        like_counter.incr(self.post.pk)
+        response = self.auth_client.get(reverse('posts:index'))
+        likes = response.context['likes']
+        self.assertIsInstance(likes, PageLikes)
+        self.assertEqual(likes.liked, {self.post.pk})
+        self.assertEqual(likes.count(self.post), 1)
+        self.assertEqual(likes.count(second), 0)
+        self.assertContains(response, '"liked": [%s]' % self.post.pk)
+        response = self.auth_client.get(
+            reverse('posts:profile', args=(self.other.username,))
+        )
+        self.assertContains(response, 'aria-pressed="true"', count=1)
@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.seed import seed_dataset
+
+
+class RenderedHtmlTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_save_renders_html_and_excerpt(self):
+        """При сохранении поста готовятся HTML текста и анонс"""
+        text = '<script> #тег\n\n' + 'слово ' * 40
+        post = Post.objects.create(author=self.user, text=text)
+        self.assertTrue(post.text_html.startswith('<p>&lt;script&gt; <a'))
+        self.assertIn('href="/tags/', post.text_html)
+        self.assertTrue(post.excerpt_html.endswith('…</p>'))
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(post.text_html, '<p>Новый текст</p>')
+
+    def test_listing_does_not_load_text(self):
+        """Лента читает анонс, а не полный текст"""
+        Post.objects.create(author=self.user, text='Длинный текст поста')
+        response = self.client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertIn('text', post.get_deferred_fields())
+        self.assertContains(response, '<p>Длинный текст поста</p>')
+
+    def test_render_posts_command_fills_old_rows(self):
+        """Команда заполняет HTML у постов, созданных в обход save()"""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Старый пост {number}')
+            for number in range(5)
+        )
+        call_command('render_posts', '--batch-size', '2', stdout=StringIO())
+        self.assertFalse(Post.objects.filter(text_html='').exists())
+        self.assertEqual(
+            Post.objects.order_by('pk').first().excerpt_html,
+            '<p>Старый пост 0</p>',
+        )
+
+    def test_seed_dataset_renders_html(self):
+        """Посты набора для бенчмарков создаются с готовым HTML"""
+        seed_dataset(
+            users=2, groups=1, posts=5, comments=0, follows_per_user=1
+        )
+        self.assertFalse(Post.objects.filter(text_html='').exists())
+        self.assertFalse(Post.objects.filter(excerpt_html='').exists())
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import DigestRun, Follow, Notification, Post, User
+from posts.notifications import build_digests
+from posts.tasks import send_digests
+
+
+class DigestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other_author = User.objects.create_user(username='other')
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com'
+        )
+        cls.followers = [
+            User.objects.create_user(username=f'follower{number}')
+            for number in range(3)
+        ]
+        for user in cls.followers + [cls.reader]:
+            Follow.objects.create(user=user, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.other_author)
+
+    def setUp(self):
+        Post.objects.create(author=self.author, text='Первый пост')
+        Post.objects.create(author=self.author, text='Второй пост')
+        Post.objects.create(author=self.other_author, text='Пост другого')
+
+    def test_one_digest_per_recipient(self):
+        """Каждый подписчик получает один дайджест со всеми постами"""
+        send_digests()
+        self.assertEqual(Notification.objects.count(), 4)
+        digest = Notification.objects.get(recipient=self.reader)
+        self.assertEqual(digest.posts_count, 3)
+        self.assertIn('Пост другого', digest.body)
+        self.assertEqual(
+            Notification.objects.get(recipient=self.followers[0]).posts_count,
+            2
+        )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.reader.email])
+        self.assertEqual(DigestRun.objects.get().recipients, 4)
+
+    def test_next_run_skips_already_sent_posts(self):
+        """Следующая рассылка не повторяет уже отправленные посты"""
+        send_digests()
+        send_digests()
+        self.assertEqual(Notification.objects.count(), 4)
+        self.assertEqual(DigestRun.objects.count(), 2)
+
+    def test_queries_do_not_grow_with_followers(self):
+        """Число запросов не зависит от числа подписчиков в пачке"""
+        run = DigestRun.objects.create(
+            window_start=timezone.now() - timedelta(hours=1),
+            window_end=timezone.now(),
+        )
+        with self.assertNumQueries(7):
+            build_digests(run, batch_size=100)
+
+    @override_settings(NOTIFICATION_BATCH_SIZE=2)
+    def test_retry_resumes_after_committed_batch(self):
+        """Повтор после сбоя продолжает рассылку и не дублирует письма"""
+        calls = []
+
+        def fail_third(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 3:
+                raise RuntimeError('Сбой рендеринга')
+            return render_to_string(*args, **kwargs)
+
+        with mock.patch(
+            'posts.notifications.render_to_string', side_effect=fail_third
+        ):
+            with self.assertRaises(RuntimeError):
+                send_digests()
+        run = DigestRun.objects.get()
+        self.assertFalse(run.finished)
+        self.assertEqual(run.recipients, 2)
+        self.assertEqual(run.last_recipient_id, self.followers[0].pk)
+        self.assertEqual(len(mail.outbox), 1)
+        send_digests()
+        run = DigestRun.objects.get()
+        self.assertTrue(run.finished)
+        self.assertEqual(run.recipients, 4)
+        self.assertEqual(Notification.objects.count(), 4)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_notifications_page_marks_read(self):
+        """Страница уведомлений показывает дайджест и отмечает прочитанным"""
+        send_digests()
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertEqual(len(response.context['unread']), 1)
+        self.assertFalse(
+            Notification.objects.filter(
+                recipient=self.reader, is_read=False
+            ).exists()
+        )
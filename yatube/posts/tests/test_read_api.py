@@ -0,0 +1,115 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.counters import drain_all
+from posts.likes import like_counter
+from posts.models import Comment, Follow, Group, Post, User
+
+
+def content(response):
+    return json.loads(response.content)
+
+
+class ReadApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(5)
+        )
+        cls.posts = list(Post.objects.order_by('-pub_date', '-pk'))
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.user, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        drain_all()
+
+    @override_settings(API_PAGE_SIZE=2)
+    def test_cursor_walks_all_posts(self):
+        """Курсор проходит все посты без пропусков и повторов"""
+        url = reverse('posts:api_posts')
+        ids = []
+        cursor = ''
+        while True:
+            data = content(self.client.get(url, {'cursor': cursor}))
+            ids.extend(item['id'] for item in data['results'])
+            cursor = data['next']
+            if cursor is None:
+                break
+        self.assertEqual(ids, [post.pk for post in self.posts])
+
+    def test_fields_select_columns(self):
+        """?fields= отдаёт только выбранные поля, в одном запросе"""
+        like_counter.incr(self.posts[0].pk)
+        url = reverse('posts:api_posts')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'fields': 'text,author,likes'})
+        first = content(response)['results'][0]
+        self.assertEqual(
+            first, {'text': 'Пост 4', 'author': 'author', 'likes': 1}
+        )
+
+    def test_unknown_field_rejected(self):
+        """Неизвестное поле — ошибка 400 со списком допустимых"""
+        response = self.client.get(
+            reverse('posts:api_posts'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', json.loads(response.content)['allowed'])
+
+    def test_broken_cursor_rejected(self):
+        """Испорченный курсор — ошибка 400, а не первая страница"""
+        urls = (
+            reverse('posts:api_posts'),
+            reverse('posts:api_post_comments', args=(self.posts[0].pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, {'cursor': 'broken'})
+                self.assertEqual(response.status_code, 400)
+
+    def test_etag_returns_not_modified(self):
+        """Совпавший ETag даёт 304, изменение поста меняет ETag"""
+        url = reverse('posts:api_post_detail', args=(self.posts[0].pk,))
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(content(response)['text'], 'Пост 4')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.filter(pk=self.posts[0].pk).update(text='Новый')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_filtered_lists(self):
+        """Лента группы, автора, подписок и комментарии поста"""
+        client = Client()
+        client.force_login(self.user)
+        Follow.objects.create(user=self.user, author=self.author)
+        urls = (
+            reverse('posts:api_group_posts', args=(self.group.slug,)),
+            reverse('posts:api_profile_posts', args=(self.author.username,)),
+            reverse('posts:api_follow_posts'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = content(client.get(url))
+                self.assertEqual(len(data['results']), len(self.posts))
+        data = content(client.get(
+            reverse('posts:api_post_comments', args=(self.posts[0].pk,))
+        ))
+        self.assertEqual(data['results'][0]['text'], 'Комментарий')
+        self.assertEqual(data['results'][0]['author'], 'reader')
+
+    def test_follow_feed_requires_login(self):
+        """Лента подписок без авторизации — 401"""
+        response = self.client.get(reverse('posts:api_follow_posts'))
+        self.assertEqual(response.status_code, 401)
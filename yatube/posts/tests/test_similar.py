@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, SimilarPost, User
+from posts.similar import rebuild_similar, update_similar
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+INDEX_PATH = os.path.join(TEMP_DIR, 'similar.npz')
+
+TEXTS = (
+    'Рецепт борща: свёкла, капуста, картофель и говядина',
+    'Для борща нужны свёкла и капуста, мясо по вкусу',
+    'Итоги футбольного матча: вратарь взял пенальти',
+    'Футбольный вратарь отразил пенальти в конце матча',
+    'Погода на выходные: дождь и ветер',
+)
+
+
+@override_settings(SIMILAR_POSTS_INDEX=INDEX_PATH, SIMILAR_POSTS_MIN_DF=1)
+class SimilarPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=text) for text in TEXTS
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        if os.path.exists(INDEX_PATH):
+            os.remove(INDEX_PATH)
+
+    def nearest(self, post):
+        return SimilarPost.objects.filter(post=post).first().similar
+
+    def test_rebuild_finds_topical_neighbours(self):
+        """Ближайший сосед поста — пост на ту же тему"""
+        self.assertEqual(rebuild_similar(), len(TEXTS))
+        self.assertEqual(self.nearest(self.posts[0]), self.posts[1])
+        self.assertEqual(self.nearest(self.posts[3]), self.posts[2])
+        self.assertFalse(
+            SimilarPost.objects.filter(post=self.posts[4]).exists()
+        )
+        self.assertTrue(os.path.exists(INDEX_PATH))
+
+    def test_incremental_update_links_both_directions(self):
+        """Новый пост получает соседей и попадает в соседи старых"""
+        rebuild_similar()
+        post = Post.objects.create(
+            author=self.user, text='Пенальти решило исход матча'
+        )
+        self.assertEqual(update_similar(), 1)
+        self.assertIn(self.nearest(post), self.posts[2:4])
+        self.assertTrue(SimilarPost.objects.filter(
+            post__in=self.posts[2:4], similar=post
+        ).exists())
+        self.assertEqual(update_similar(), 0)
+
+    @override_settings(SIMILAR_POSTS_CHUNK_SIZE=2, SIMILAR_POSTS_TOP_K=1)
+    def test_chunked_rebuild_keeps_top_k(self):
+        """Пересчёт пачками оставляет не больше K соседей и не мусорит"""
+        self.assertEqual(rebuild_similar(), len(TEXTS))
+        self.assertEqual(self.nearest(self.posts[0]), self.posts[1])
+        self.assertEqual(self.nearest(self.posts[2]), self.posts[3])
+        self.assertEqual(
+            SimilarPost.objects.filter(post=self.posts[0]).count(), 1
+        )
+        self.assertEqual(os.listdir(TEMP_DIR), ['similar.npz'])
+
+    def test_post_detail_reads_neighbours(self):
+        """Страница поста показывает похожие посты"""
+        call_command('build_similar', stdout=StringIO())
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.posts[0].pk,))
+        )
+        self.assertEqual(
+            response.context['similar_posts'][0].similar, self.posts[1]
+        )
@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, FollowSuggestion, Post, User
+from posts.suggestions import refresh_suggestions
+
+
+class FollowSuggestionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        names = ('auth', 'friend', 'other', 'popular', 'quiet', 'followed')
+        cls.users = {
+            name: User.objects.create_user(username=name) for name in names
+        }
+        edges = (
+            ('auth', 'friend'), ('auth', 'other'), ('auth', 'followed'),
+            ('friend', 'popular'), ('other', 'popular'),
+            ('friend', 'quiet'), ('friend', 'followed'),
+            ('popular', 'auth'),
+        )
+        for user, author in edges:
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+        Post.objects.create(author=cls.users['quiet'], text='Пост')
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(self.users['auth'])
+
+    def suggested(self, name):
+        return list(FollowSuggestion.objects.filter(
+            user=self.users[name]
+        ).values_list('author__username', 'mutual'))
+
+    def test_ranked_by_mutual_follows(self):
+        """Кандидаты упорядочены по числу общих подписок"""
+        refresh_suggestions()
+        self.assertEqual(
+            self.suggested('auth'), [('popular', 2), ('quiet', 1)]
+        )
+
+    def test_excludes_self_and_existing_follows(self):
+        """В рекомендациях нет себя и уже оформленных подписок"""
+        refresh_suggestions()
+        self.assertNotIn('auth', dict(self.suggested('popular')))
+        for user, author in Follow.objects.values_list('user', 'author'):
+            with self.subTest(user=user, author=author):
+                self.assertFalse(FollowSuggestion.objects.filter(
+                    user=user, author=author
+                ).exists())
+
+    def test_chunks_and_top_k(self):
+        """Расчёт пачками совпадает с расчётом целиком, top-k соблюдается"""
+        refresh_suggestions(chunk_size=1)
+        chunked = self.suggested('auth')
+        refresh_suggestions()
+        self.assertEqual(chunked, self.suggested('auth'))
+        refresh_suggestions(top_k=1)
+        self.assertEqual(self.suggested('auth'), [('popular', 2)])
+
+    def test_refresh_drops_stale_suggestions(self):
+        """Пересчёт убирает рекомендации пользователей без подписок"""
+        refresh_suggestions()
+        Follow.objects.filter(user=self.users['popular']).delete()
+        newcomer = User.objects.create_user(username='newcomer')
+        FollowSuggestion.objects.create(
+            user=newcomer, author=self.users['quiet'], mutual=1, score=1
+        )
+        refresh_suggestions(chunk_size=2)
+        self.assertEqual(self.suggested('popular'), [])
+        self.assertFalse(
+            FollowSuggestion.objects.filter(user=newcomer).exists()
+        )
+        self.assertEqual(
+            self.suggested('auth'), [('popular', 2), ('quiet', 1)]
+        )
+
+    def test_command_reports_count(self):
+        """Команда пересчитывает таблицу рекомендаций"""
+        out = StringIO()
+        call_command('refresh_suggestions', stdout=out)
+        self.assertIn(str(FollowSuggestion.objects.count()), out.getvalue())
+
+    def test_pages_show_suggestions(self):
+        """Рекомендации выводятся на странице подписок и в профиле"""
+        refresh_suggestions()
+        pages = (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', args=('friend',)),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.auth_client.get(url)
+                self.assertEqual(
+                    [suggestion.author.username
+                     for suggestion in response.context['suggestions']],
+                    ['popular', 'quiet'],
+                )
+
+    def test_followed_suggestion_hidden_before_refresh(self):
+        """Подписка сразу убирает автора из рекомендаций"""
+        refresh_suggestions()
+        Follow.objects.create(
+            user=self.users['auth'], author=self.users['popular']
+        )
+        response = self.auth_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [suggestion.author.username
+             for suggestion in response.context['suggestions']],
+            ['quiet'],
+        )
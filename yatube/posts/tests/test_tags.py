@@ -0,0 +1,124 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, PostTag, Tag, User
+from posts.markup import linkify
+from posts.tags import extract_tags, sync_tags
+
+
+class TagsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+
+    def test_extract_tags(self):
+        """Теги и упоминания разбираются без повторов и якорей"""
+        self.assertEqual(
+            extract_tags('#Django и #django, привет @Leo! a#b &#39;'),
+            [('#', 'django'), ('@', 'leo')],
+        )
+
+    def test_linkify_escapes_text(self):
+        """Теги становятся ссылками, остальной текст экранируется"""
+        self.assertEqual(
+            linkify('<b> #питон @leo'),
+            '&lt;b&gt; <a href="/tags/%D0%BF%D0%B8%D1%82%D0%BE%D0%BD/">'
+            '#питон</a> <a href="/mentions/leo/">@leo</a>',
+        )
+
+    def test_create_and_edit_sync_tags(self):
+        """Теги пишутся при создании поста и обновляются при правке"""
+        self.auth_client.post(
+            reverse('posts:post_create'), {'text': 'Пост #one #two'}
+        )
+        post = Post.objects.get()
+        self.assertEqual(
+            set(post.post_tags.values_list('tag__name', flat=True)),
+            {'one', 'two'},
+        )
+        self.auth_client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': 'Пост #two #three'},
+        )
+        self.assertEqual(
+            set(post.post_tags.values_list('tag__name', flat=True)),
+            {'two', 'three'},
+        )
+        self.assertEqual(
+            set(post.post_tags.values_list('pub_date', flat=True)),
+            {post.pub_date},
+        )
+
+    @override_settings(LIMITS_IN_PAGE=2)
+    def test_tag_page_cursor_pagination(self):
+        """Страница тега листается курсором от новых к старым"""
+        posts = []
+        for number in range(5):
+            post = Post.objects.create(
+                author=self.user, text=f'Пост {number} #news'
+            )
+            sync_tags(post)
+            posts.append(post)
+        Post.objects.create(author=self.user, text='Без тегов')
+        url = reverse('posts:tag', args=('News',))
+        seen = []
+        cursor = ''
+        while True:
+            response = self.client.get(url, {'cursor': cursor})
+            seen.extend(response.context['posts'])
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, posts[::-1])
+        broken = self.client.get(url, {'cursor': 'broken'})
+        self.assertEqual(len(broken.context['posts']), 2)
+
+    @override_settings(LIMITS_IN_PAGE=2)
+    def test_tag_page_with_multi_tag_posts(self):
+        """Посты с несколькими тегами не повторяются на следующих страницах"""
+        posts = []
+        for number in range(5):
+            post = Post.objects.create(
+                author=self.user, text=f'Пост {number} #news #daily #misc'
+            )
+            sync_tags(post)
+            posts.append(post)
+        url = reverse('posts:tag', args=('news',))
+        seen = []
+        cursor = ''
+        while True:
+            response = self.client.get(url, {'cursor': cursor})
+            seen.extend(post.pk for post in response.context['posts'])
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [post.pk for post in posts[::-1]])
+
+    def test_mention_page(self):
+        """Упоминания выводятся на отдельной странице"""
+        post = Post.objects.create(author=self.user, text='Привет @auth')
+        sync_tags(post)
+        response = self.client.get(reverse('posts:mention', args=('auth',)))
+        self.assertEqual(response.context['posts'], [post])
+        self.assertEqual(
+            self.client.get(reverse('posts:tag', args=('auth',))).status_code,
+            404,
+        )
+
+    def test_backfill_command(self):
+        """Команда разбирает теги в старых постах пачками"""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'#old пост {number} @auth')
+            for number in range(5)
+        )
+        call_command('backfill_tags', '--batch-size', '2', stdout=StringIO())
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertEqual(PostTag.objects.count(), 10)
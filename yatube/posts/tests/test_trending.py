@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.counters import drain_all
+from posts.models import Post, User
+from posts.trending import FOLDED_AT_KEY, comment_counter, fold_trending
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        drain_all()
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+
+    def comment(self, post, times=1):
+        for _ in range(times):
+            self.auth_client.post(
+                reverse('posts:add_comment', args=(post.pk,)),
+                {'text': 'Комментарий'},
+            )
+
+    def test_comment_bumps_counter_without_touching_score(self):
+        """Комментарий увеличивает счётчик в памяти, а не колонку"""
+        self.comment(self.posts[0], times=2)
+        self.assertEqual(comment_counter.pending([self.posts[0].pk]),
+                         {self.posts[0].pk: 2})
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].trending_score, 0)
+
+    @override_settings(TRENDING_FLUSH_EVERY=3)
+    def test_comments_flushed_every_n(self):
+        """Каждые N комментариев прибавляются к рейтингу одним UPDATE"""
+        self.comment(self.posts[0], times=2)
+        self.comment(self.posts[1])
+        self.assertEqual(
+            dict(Post.objects.values_list('pk', 'trending_score')),
+            {self.posts[0].pk: 2, self.posts[1].pk: 1, self.posts[2].pk: 0},
+        )
+        self.assertEqual(comment_counter.pending([self.posts[0].pk]), {})
+
+    def test_fold_decays_score(self):
+        """Свёртка гасит рейтинг по периоду полураспада"""
+        self.comment(self.posts[0], times=4)
+        self.comment(self.posts[1])
+        comment_counter.flush()
+        caches['shared'].set(FOLDED_AT_KEY, 1000)
+        fold_trending(now=1000 + settings.TRENDING_HALF_LIFE)
+        scores = dict(Post.objects.values_list('pk', 'trending_score'))
+        self.assertAlmostEqual(scores[self.posts[0].pk], 2)
+        self.assertAlmostEqual(scores[self.posts[1].pk], 0.5)
+        self.assertEqual(caches['shared'].get(FOLDED_AT_KEY),
+                         1000 + settings.TRENDING_HALF_LIFE)
+
+    def test_trending_page_is_ranked_without_extra_queries(self):
+        """Рейтинг — запрос постов и лайков, посты по убыванию рейтинга"""
+        self.comment(self.posts[2], times=3)
+        self.comment(self.posts[0])
+        comment_counter.flush()
+        self.auth_client.get(reverse('about:author'))
+        with self.assertNumQueries(2):
+            response = self.auth_client.get(reverse('posts:trending'))
+        self.assertEqual(
+            list(response.context['posts']),
+            [self.posts[2], self.posts[0]],
+        )
+
+    def test_trending_fragment_shared_between_users(self):
+        """Фрагмент рейтинга общий, лайки выводятся для каждого свои"""
+        self.comment(self.posts[0])
+        comment_counter.flush()
+        self.auth_client.get(reverse('posts:trending'))
+        Post.objects.update(excerpt_html='<p>Новый текст</p>')
+        other = User.objects.create_user(username='other')
+        other_client = Client()
+        other_client.force_login(other)
+        response = other_client.get(reverse('posts:trending'))
+        self.assertNotContains(response, 'Новый текст')
+        self.assertContains(response, f'"user_id": {other.pk}')
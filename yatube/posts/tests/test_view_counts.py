@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.view_counts import flush_views, view_counter
+
+
+class ViewCountsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        view_counter.drain()
+        self.url = reverse('posts:post_detail', args=(self.post.pk,))
+
+    def test_views_buffered_and_merged_on_read(self):
+        """Просмотры копятся в буфере и видны до сброса в базу"""
+        for _ in range(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['views'], 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+
+    def test_flush_writes_single_update(self):
+        """Сброс пишет приросты одним UPDATE и обнуляет буфер"""
+        other = Post.objects.create(author=self.user, text='Другой')
+        view_counter.incr(self.post.pk, 2)
+        view_counter.incr(other.pk, 5)
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_views(), 2)
+        self.assertEqual(
+            dict(Post.objects.values_list('pk', 'views')),
+            {self.post.pk: 2, other.pk: 5},
+        )
+        self.assertEqual(view_counter.pending([self.post.pk]), {})
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['views'], 3)
+
+    def test_view_adds_no_queries(self):
+        """Просмотр не добавляет запросов к странице поста"""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(self.url)
+        with mock.patch('posts.views.count_view'):
+            with self.assertNumQueries(len(first)):
+                self.client.get(self.url)
+
+    @override_settings(VIEWS_FLUSH_EVERY=2)
+    def test_flushed_every_n_views(self):
+        """Каждые N просмотров приросты пишутся в базу"""
+        for _ in range(5):
+            self.client.get(self.url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 4)
+        self.assertEqual(view_counter.pending([self.post.pk]),
+                         {self.post.pk: 1})
+
+    def test_failed_flush_returns_deltas(self):
+        """Если запись не удалась, приросты возвращаются в буфер"""
+        view_counter.incr(self.post.pk, 4)
+        with mock.patch(
+            'posts.view_counts.bulk_increment', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                flush_views()
+        self.assertEqual(view_counter.pending([self.post.pk]),
+                         {self.post.pk: 4})
@@ -5,11 +5,14 @@ from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from core.counters import drain_all
 from posts.forms import PostForm
-from posts.models import Follow, Group, Post, User
+from posts.models import Follow, Group, Like, Post, User
 
 SHIFT_POST = 3
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -212,3 +215,117 @@ class PaginatorViewsTest(TestCase):
                             len(response.context['page_obj'].object_list)
                         )
                         self.assertEqual(posts_on_pages, page_quantity)
+
+
+class FollowButtonsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        User.objects.bulk_create(
+            User(username=f'author_{number}') for number in range(5)
+        )
+        cls.authors = list(User.objects.filter(username__startswith='author'))
+        Post.objects.bulk_create(
+            Post(text='Пост', author=author, group=cls.group)
+            for author in cls.authors
+        )
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+
+    def test_follow_state_resolved_in_one_query(self):
+        """Состояние подписки для всех авторов страницы берётся разом"""
+        url = reverse('posts:group_posts', args=(self.group.slug,))
+        self.auth_client.get(url)
+        drain_all()
+        with self.assertNumQueries(5):
+            response = self.auth_client.get(url)
+        self.assertEqual(
+            set(response.context['followed_authors']), {self.authors[0].pk}
+        )
+        content = response.content.decode()
+        for author in self.authors:
+            with self.subTest(author=author.username):
+                self.assertIn(f'data-author="{author.username}"', content)
+
+    def test_index_cache_varies_by_user(self):
+        """Кэш главной страницы не отдаёт кнопки чужого пользователя"""
+        self.auth_client.get(reverse('posts:index'))
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'data-author=')
+
+    def test_index_fragment_shared_between_users(self):
+        """Фрагмент главной общий, подписки выводятся для каждого свои"""
+        self.auth_client.get(reverse('posts:index'))
+        Post.objects.update(excerpt_html='<p>Новый текст</p>')
+        other = Client()
+        other.force_login(self.authors[1])
+        response = other.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Новый текст')
+        content = response.content.decode()
+        self.assertIn(f'"user_id": {self.authors[1].pk}', content)
+        self.assertIn('"followed": []', content)
+        self.assertIn(f'data-author-id="{self.authors[1].pk}"', content)
+
+
+class ListingQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+
+    def add_posts(self, count):
+        start = Post.objects.count()
+        for number in range(start, start + count):
+            author = User.objects.create_user(username=f'author_{number}')
+            Follow.objects.create(user=self.user, author=author)
+            post = Post.objects.create(
+                author=author, group=self.group, text=f'Пост {number}'
+            )
+            Like.objects.create(user=self.user, post=post)
+
+    def count_queries(self, url):
+        cache.clear()
+        self.auth_client.get(reverse('about:author'))
+        with CaptureQueriesContext(connection) as context:
+            response = self.auth_client.get(url)
+        return len(context), response
+
+    def test_listing_queries_do_not_grow_with_page(self):
+        """Число запросов ленты не зависит от числа постов на странице"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=(self.group.slug,)),
+            reverse('posts:follow_index'),
+        )
+        self.add_posts(1)
+        single = {url: self.count_queries(url)[0] for url in urls}
+        self.add_posts(settings.LIMITS_IN_PAGE - 1)
+        for url in urls:
+            with self.subTest(url=url):
+                queries, response = self.count_queries(url)
+                self.assertEqual(
+                    len(response.context['page_obj']),
+                    settings.LIMITS_IN_PAGE,
+                )
+                self.assertEqual(queries, single[url])
+
+    def test_listing_loads_only_rendered_columns(self):
+        """Лента не читает текст поста, пароль автора и описание группы"""
+        self.add_posts(1)
+        response = self.auth_client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertIn('text', post.get_deferred_fields())
+        self.assertIn('password', post.author.get_deferred_fields())
+        self.assertIn('description', post.group.get_deferred_fields())
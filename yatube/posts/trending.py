@@ -0,0 +1,65 @@
+"""Рейтинг обсуждаемых постов.
+
+add_comment увеличивает счётчик в памяти процесса, процесс прибавляет
+накопленные комментарии к рейтингу одним UPDATE раз в
+TRENDING_FLUSH_INTERVAL секунд или после TRENDING_FLUSH_EVERY
+комментариев. Периодическая задача fold_trending раз в
+TRENDING_FOLD_INTERVAL секунд гасит рейтинги по периоду полураспада.
+Страница trending читает готовый рейтинг по индексу.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F, FloatField
+
+from core.counters import BufferedCounter, bulk_increment
+
+from .models import Post
+
+
+def write_comments(deltas):
+    bulk_increment(
+        Post.objects.all(), 'trending_score', deltas, FloatField()
+    )
+
+
+comment_counter = BufferedCounter(
+    'trending_comments', write_comments, 'TRENDING'
+)
+FOLDED_AT_KEY = 'trending:folded_at'
+
+
+def decay_factor(elapsed):
+    return 0.5 ** (elapsed / settings.TRENDING_HALF_LIFE)
+
+
+def fold_trending(now=None):
+    """Гасит Post.trending_score за время с прошлой свёртки.
+
+    Возвращает число постов, чей рейтинг изменился.
+    """
+    now = time.time() if now is None else now
+    cache = caches['shared']
+    folded_at = cache.get(FOLDED_AT_KEY)
+    if folded_at is None:
+        elapsed = settings.TRENDING_FOLD_INTERVAL
+    else:
+        elapsed = max(now - folded_at, 0)
+    with transaction.atomic():
+        decayed = Post.objects.filter(trending_score__gt=0).update(
+            trending_score=F('trending_score') * decay_factor(elapsed)
+        )
+        Post.objects.filter(
+            trending_score__gt=0,
+            trending_score__lt=settings.TRENDING_MIN_SCORE,
+        ).update(trending_score=0)
+    cache.set(FOLDED_AT_KEY, now, None)
+    return decayed
+
+
+def trending_posts():
+    return Post.objects.filter(trending_score__gt=0).for_listing().order_by(
+        '-trending_score'
+    )[:settings.TRENDING_SIZE]
@@ -1,6 +1,7 @@
 from django.urls import path
 
-from . import views
+from . import api, views
+from .models import Tag
 
 app_name = 'posts'
 
@@ -17,6 +18,15 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('trending/', views.trending, name='trending'),
+    path('tags/<str:name>/', views.tag, name='tag'),
+    path(
+        'mentions/<str:name>/',
+        views.tag,
+        {'kind': Tag.MENTION},
+        name='mention'
+    ),
+    path('notifications/', views.notifications, name='notifications'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -27,4 +37,42 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path(
+        'api/profile/<str:username>/follow/',
+        api.profile_follow,
+        name='api_profile_follow'
+    ),
+    path(
+        'api/profile/<str:username>/unfollow/',
+        api.profile_unfollow,
+        name='api_profile_unfollow'
+    ),
+    path(
+        'api/posts/<int:post_id>/like/',
+        api.post_like,
+        name='api_post_like'
+    ),
+    path('api/follow/unread/', api.feed_unread, name='api_feed_unread'),
+    path('api/posts/', api.posts_list, name='api_posts'),
+    path(
+        'api/posts/<int:post_id>/',
+        api.post_detail,
+        name='api_post_detail'
+    ),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        api.post_comments,
+        name='api_post_comments'
+    ),
+    path(
+        'api/group/<slug:slug>/posts/',
+        api.group_posts,
+        name='api_group_posts'
+    ),
+    path(
+        'api/profile/<str:username>/posts/',
+        api.profile_posts,
+        name='api_profile_posts'
+    ),
+    path('api/follow/posts/', api.follow_posts, name='api_follow_posts'),
 ]
@@ -1,5 +1,12 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import SimpleLazyObject
+
+from .models import Follow, FollowSuggestion
 
 
 def paginations(request, posts_list):
@@ -7,3 +14,75 @@ def paginations(request, posts_list):
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def followed_authors(user, posts):
+    """id авторов из posts, на которых подписан user, одним запросом.
+
+    Множество вычисляется лениво, при первом обращении из шаблона, и
+    не запрашивается, если страница его не выводит.
+    """
+    def resolve():
+        if not user.is_authenticated:
+            return set()
+        author_ids = {post.author_id for post in posts}
+        return set(Follow.objects.filter(
+            user=user, author_id__in=author_ids
+        ).values_list('author_id', flat=True))
+    return SimpleLazyObject(resolve)
+
+
+def follow_suggestions(user, exclude=None):
+    """Готовые рекомендации для user без уже оформленных подписок."""
+    if not user.is_authenticated:
+        return []
+    suggestions = FollowSuggestion.objects.filter(user=user).exclude(
+        author__in=Follow.objects.filter(user=user).values('author')
+    ).select_related('author')
+    if exclude is not None:
+        suggestions = suggestions.exclude(author=exclude)
+    return suggestions[:settings.SUGGESTIONS_SHOWN]
+
+
+def encode_cursor(pub_date, pk):
+    """Непрозрачный курсор для постраничного вывода по (pub_date, pk)."""
+    value = f'{pub_date.isoformat()}|{pk}'
+    return urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(pub_date, pk) из курсора или None, если курсор испорчен."""
+    try:
+        value = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        pub_date, pk = value.decode().split('|')
+        pub_date, pk = parse_datetime(pub_date), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+def cursor_page(queryset, cursor, date_lookup='pub_date', pk_lookup='pk',
+                size=None, row_key=None):
+    """Посты после cursor при сортировке по убыванию (дата, id).
+
+    Для строк values() или другой модели, например PostTag, row_key
+    возвращает (дата, id) строки. Возвращает список строк и курсор следующей
+    страницы или None.
+    """
+    size = size or settings.LIMITS_IN_PAGE
+    row_key = row_key or (lambda post: (post.pub_date, post.pk))
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        pub_date, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{date_lookup}__lt': pub_date})
+            | Q(**{date_lookup: pub_date, f'{pk_lookup}__lt': pk})
+        )
+    posts = list(
+        queryset.order_by(f'-{date_lookup}', f'-{pk_lookup}')[:size + 1]
+    )
+    if len(posts) <= size:
+        return posts, None
+    return posts[:size], encode_cursor(*row_key(posts[size - 1]))
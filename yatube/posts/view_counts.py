@@ -0,0 +1,34 @@
+"""Счётчик просмотров постов с буфером в памяти процесса.
+
+Просмотр увеличивает счётчик в памяти процесса; в базу приросты
+пишутся одним UPDATE раз в VIEWS_FLUSH_INTERVAL секунд, после
+VIEWS_FLUSH_EVERY просмотров и при остановке процесса, так что сам
+просмотр не обращается ни к базе, ни к кэшу.
+Страница показывает сумму сохранённого значения и несброшенного.
+"""
+from core.counters import BufferedCounter, bulk_increment
+
+from .models import Post
+
+
+def write_views(deltas):
+    bulk_increment(Post.objects.all(), 'views', deltas)
+
+
+view_counter = BufferedCounter('post_views', write_views, 'VIEWS')
+
+
+def count_view(post_id):
+    view_counter.incr(post_id)
+
+
+def views_count(post):
+    return post.views + view_counter.pending([post.pk]).get(post.pk, 0)
+
+
+def flush_views():
+    """Пишет накопленные просмотры в Post.views, возвращает число постов.
+
+    Если запись не удалась, приросты возвращаются в буфер.
+    """
+    return view_counter.flush()
@@ -1,35 +1,58 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.tasks import enqueue
+
+from .duplicates import index_post
+from .feed import forget_unread, mark_seen
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import paginations
+from .likes import PageLikes
+from .models import (LISTING_FIELDS, Follow, Group, Notification, Post,
+                     PostTag, Tag, User)
+from .tags import sync_tags
+from .trending import comment_counter, trending_posts
+from .utils import (cursor_page, followed_authors, follow_suggestions,
+                    paginations)
+from .view_counts import count_view, views_count
+
+
+def enqueue_thumbnails(post):
+    if post.image:
+        enqueue(
+            'posts.generate_thumbnails',
+            key=f'thumbnails:{post.pk}:{post.image.name}',
+            post_id=post.pk,
+        )
 
 
 def index(request):
-    post_list = Post.objects.select_related(
-        'author').select_related('group').all()
+    post_list = Post.objects.for_listing()
     page_obj = paginations(request, post_list)
     context = {
         'page_obj': page_obj,
+        'followed_authors': followed_authors(request.user, page_obj),
+        'likes': PageLikes(request.user, page_obj),
     }
     return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author').all()
+    post_list = group.posts.for_listing()
     page_obj = paginations(request, post_list)
     context = {
         'page_obj': page_obj,
-        'group': group
+        'group': group,
+        'followed_authors': followed_authors(request.user, page_obj),
+        'likes': PageLikes(request.user, page_obj),
     }
     return render(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('group')
+    posts = author.posts.for_listing()
     page_obj = paginations(request, posts)
     following = (
         request.user.is_authenticated
@@ -40,6 +63,8 @@ def profile(request, username):
         'page_obj': page_obj,
         'author': author,
         'following': following,
+        'likes': PageLikes(request.user, page_obj),
+        'suggestions': follow_suggestions(request.user, exclude=author),
     }
     return render(request, 'posts/profile.html', context)
 
@@ -51,10 +76,16 @@ def post_detail(request, post_id):
         ).prefetch_related('comments__author'), pk=post_id
     )
     form = CommentForm(request.POST or None)
+    count_view(post.pk)
     context = {
         'post': post,
+        'views': views_count(post),
+        'likes': PageLikes(request.user, [post]),
         'form': form,
-        'comments': post.comments.all()
+        'comments': post.comments.all(),
+        'similar_posts': post.similar.select_related(
+            'similar__author'
+        )[:settings.SIMILAR_POSTS_SHOWN],
     }
     return render(request, 'posts/post_detail.html', context)
 
@@ -69,6 +100,13 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        index_post(post)
+        sync_tags(post)
+        enqueue_thumbnails(post)
+        enqueue(
+            'posts.bump_unread', key=f'bump_unread:{post.pk}',
+            post_id=post.pk,
+        )
         return redirect('posts:profile', request.user)
     context = {
         'form': form,
@@ -87,7 +125,10 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        index_post(post)
+        sync_tags(post)
+        enqueue_thumbnails(post)
         return redirect('posts:post_detail', post_id)
     return render(request, 'posts/create_post.html', {'form': form, })
 
@@ -101,6 +142,7 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        comment_counter.incr(post.pk)
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -108,10 +150,13 @@ def add_comment(request, post_id):
 def follow_index(request):
     post_list = Post.objects.filter(
         author__following__user=request.user
-    ).select_related('author', 'group')
+    ).for_listing()
     page_obj = paginations(request, post_list)
     context = {
         'page_obj': page_obj,
+        'last_seen': mark_seen(request.user),
+        'suggestions': follow_suggestions(request.user),
+        'likes': PageLikes(request.user, page_obj),
     }
     return render(request, 'posts/follow.html', context)
 
@@ -125,6 +170,7 @@ def profile_follow(request, username):
             user=user,
             author=author,
         )
+        forget_unread(user.pk)
     return redirect('posts:profile', username=username)
 
 
@@ -135,4 +181,54 @@ def profile_unfollow(request, username):
         user=request.user,
         author__username=username
     ).delete()
+    forget_unread(request.user.pk)
     return redirect('posts:profile', username=username)
+
+
+def tag(request, name, kind=Tag.HASHTAG):
+    tag = get_object_or_404(Tag, kind=kind, name=name.lower())
+    post_tags, next_cursor = cursor_page(
+        PostTag.objects.filter(tag=tag).select_related(
+            'post__author', 'post__group'
+        ).only(
+            'pub_date', 'post', *(f'post__{field}' for field in LISTING_FIELDS)
+        ),
+        request.GET.get('cursor'),
+        pk_lookup='post',
+        row_key=lambda post_tag: (post_tag.pub_date, post_tag.post_id),
+    )
+    posts = [post_tag.post for post_tag in post_tags]
+    context = {
+        'tag': tag,
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'likes': PageLikes(request.user, posts),
+    }
+    return render(request, 'posts/tag.html', context)
+
+
+def trending(request):
+    posts = trending_posts()
+    context = {
+        'posts': posts,
+        'likes': PageLikes(request.user, posts),
+        'cache_seconds': settings.TRENDING_CACHE_SECONDS,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+@login_required
+def notifications(request):
+    notification_list = request.user.notifications.all()
+    page_obj = paginations(request, notification_list)
+    unread = [
+        notification.pk for notification in page_obj
+        if not notification.is_read
+    ]
+    if unread:
+        Notification.objects.filter(pk__in=unread).update(is_read=True)
+    context = {
+        'page_obj': page_obj,
+        'unread': set(unread),
+    }
+    return render(request, 'posts/notifications.html', context)
@@ -1,5 +1,7 @@
-from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+
+from core.tasks import enqueue
 
 User = get_user_model()
 
@@ -8,3 +10,27 @@ class CreationForm(UserCreationForm):
     class Meta:
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо со сбросом пароля отправляется фоновой задачей.
+
+    В очередь попадают только пользователь и адрес: токен и ссылка
+    создаются воркером и в таблице задач не хранятся.
+    """
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        enqueue(
+            'users.send_email',
+            user_id=context['user'].pk,
+            to_email=to_email,
+            domain=context['domain'],
+            site_name=context['site_name'],
+            protocol=context['protocol'],
+            from_email=from_email,
+            subject_template_name=subject_template_name,
+            email_template_name=email_template_name,
+            html_email_template_name=html_email_template_name,
+        )
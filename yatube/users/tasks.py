@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.tasks import task
+
+User = get_user_model()
+
+
+@task('users.send_email')
+def send_email(user_id, to_email, domain, site_name, protocol,
+               subject_template_name, email_template_name,
+               from_email=None, html_email_template_name=None):
+    """Отправляет письмо сброса пароля, создавая токен в воркере."""
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return
+    context = {
+        'email': to_email,
+        'domain': domain,
+        'site_name': site_name,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': protocol,
+    }
+    subject = loader.render_to_string(subject_template_name, context)
+    body = loader.render_to_string(email_template_name, context)
+    message = EmailMultiAlternatives(
+        ''.join(subject.splitlines()), body, from_email, [to_email]
+    )
+    if html_email_template_name is not None:
+        message.attach_alternative(
+            loader.render_to_string(html_email_template_name, context),
+            'text/html',
+        )
+    message.send()
@@ -2,6 +2,7 @@ from django.contrib.auth.views import LogoutView, LoginView, PasswordResetView
 from django.urls import path
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -23,7 +24,7 @@ urlpatterns = [
     ),
     path(
         'password_reset/',
-        PasswordResetView.as_view(),
+        PasswordResetView.as_view(form_class=QueuedPasswordResetForm),
         name='password_reset_form'
     ),
 ]
@@ -32,6 +32,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.CounterFlushMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SamplingProfilerMiddleware',
+    'core.middleware.MemoryAccountingMiddleware',
+    'core.middleware.SlowRequestLogMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,11 +64,22 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'posts.context_processors.feed_unread',
             ],
         },
     },
 ]
 
+# Замеры рендеринга шаблонов включаются переменной окружения.
+TEMPLATE_PROFILING = bool(os.getenv('TEMPLATE_PROFILING'))
+TEMPLATE_PROFILING_LOG_LIMIT = 15
+
+if TEMPLATE_PROFILING:
+    TEMPLATES[0]['BACKEND'] = (
+        'core.template_backends.InstrumentedDjangoTemplates'
+    )
+    MIDDLEWARE.append('core.middleware.TemplateProfilingMiddleware')
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
@@ -70,10 +87,51 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+    }
+}
+
+# Реплики только для чтения: пути к копиям базы через запятую в
+# DATABASE_REPLICAS. Копии обновляет команда sync_replicas.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1
+):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.routers.ReadReplicaRouter']
+DATABASE_REPLICA_APPS = ['posts']
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+# Применяются к каждому новому соединению SQLite, см. core.db.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
 }
 
 
+# Сессия и пользователь читаются из общего кэша CACHES['shared'] (в
+# продакшене memcached) по одному обращению на каждый: выход из аккаунта
+# и смена пароля сразу видны всем процессам. ModelBackend
+# оставлен для сессий, созданных до появления CachedModelBackend.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'shared'
+AUTHENTICATION_BACKENDS = [
+    'core.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -117,10 +175,168 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
+# Общий для процессов кэш вне базы: сессии, снимки пользователей,
+# счётчики ленты. В продакшене это memcached по адресу
+# MEMCACHED_LOCATION (проверка core.E001 в check --deploy); без него
+# кэш живёт в памяти процесса, что годится только для разработки.
+MEMCACHED_LOCATION = os.getenv('MEMCACHED_LOCATION')
+if MEMCACHED_LOCATION:
+    CACHES['shared'] = {
+        'BACKEND': 'core.cache.InstrumentedMemcachedCache',
+        'LOCATION': MEMCACHED_LOCATION,
+        'TIMEOUT': None,
+    }
+else:
+    CACHES['shared'] = {
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
+        'LOCATION': 'shared',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+# Журнал медленных запросов, включается переменной окружения
+# SLOW_REQUEST_LOG. Параметры SQL пишутся в журнал только при
+# SLOW_REQUEST_LOG_PARAMS: в них бывают ключи сессий и личные данные.
+SLOW_REQUEST_LOG = bool(os.getenv('SLOW_REQUEST_LOG'))
+SLOW_REQUEST_LOG_PARAMS = False
+SLOW_REQUEST_LOG_FILE = os.getenv(
+    'SLOW_REQUEST_LOG_FILE',
+    os.path.join(BASE_DIR, 'logs', 'slow_requests.log'),
+)
+SLOW_REQUEST_THRESHOLD_MS = 500
+SLOW_QUERY_EXPLAIN_THRESHOLD_MS = 20
+SLOW_REQUEST_MAX_QUERIES = 500
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_requests': {
+            'class': 'core.log_handlers.DirectoryRotatingFileHandler',
+            'filename': SLOW_REQUEST_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'encoding': 'utf-8',
+        },
+    },
+    'loggers': {
+        'yatube': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'yatube.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+THUMBNAIL_ENGINE = 'core.thumbnail.InstrumentedEngine'
+
+# Каталог, через который воркеры делятся метриками для /metrics.
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+# Токен для сборщика метрик: заголовок Authorization: Bearer <токен>.
+# Без токена /metrics отвечает 404.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Семплирующий профилировщик запросов, включается заданием PROFILER_DIR.
+PROFILER_DIR = os.getenv('PROFILER_DIR')
+PROFILER_SAMPLE_RATE = 0.01
+PROFILER_SLOW_THRESHOLD_MS = 1000
+PROFILER_INTERVAL_MS = 5
+PROFILER_MAX_FILES = 500
+PROFILER_LIST_LIMIT = 50
+
+# Учёт памяти и крупных выборок по запросам, включается переменной
+# окружения MEMORY_PROFILING.
+MEMORY_PROFILING = bool(os.getenv('MEMORY_PROFILING'))
+MEMORY_WARN_BYTES = 64 * 1024 * 1024
+MEMORY_MAX_QUERY_ROWS = 1000
+MEMORY_MAX_MODEL_INSTANCES = 5000
+
+# Фоновые задачи core.Task, выполняются командой run_worker.
+TASKS_EAGER = False
+TASKS_LEASE = 300
+TASKS_RETRY_BASE_DELAY = 10
+TASKS_RETRY_MAX_DELAY = 3600
+TASKS_KEEP_DONE_DAYS = 7
+# Адрес сайта для ссылок в письмах.
+SITE_URL = os.getenv('SITE_URL', 'http://127.0.0.1:8000')
+
+NOTIFICATION_DIGEST_INTERVAL = 60 * 60
+NOTIFICATION_DIGEST_MAX_POSTS = 20
+NOTIFICATION_BATCH_SIZE = 1000
+
+SUGGESTIONS_INTERVAL = 6 * 60 * 60
+SUGGESTIONS_TOP_K = 20
+SUGGESTIONS_SHOWN = 5
+SUGGESTIONS_CHUNK_SIZE = 2000
+SUGGESTIONS_ACTIVITY_DAYS = 30
+SUGGESTIONS_ACTIVITY_WEIGHT = 0.5
+
+TRENDING_FOLD_INTERVAL = 60
+TRENDING_FLUSH_INTERVAL = 10
+TRENDING_FLUSH_EVERY = 100
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_MIN_SCORE = 0.01
+TRENDING_SIZE = 20
+TRENDING_CACHE_SECONDS = 5
+
+SIMILAR_POSTS_INDEX = os.getenv(
+    'SIMILAR_POSTS_INDEX', os.path.join(BASE_DIR, 'vectors', 'similar.npz')
+)
+SIMILAR_POSTS_UPDATE_INTERVAL = 10 * 60
+SIMILAR_POSTS_REBUILD_INTERVAL = 24 * 60 * 60
+SIMILAR_POSTS_TOP_K = 10
+SIMILAR_POSTS_SHOWN = 5
+SIMILAR_POSTS_CHUNK_SIZE = 500
+SIMILAR_POSTS_MIN_DF = 2
+SIMILAR_POSTS_MAX_DF = 0.5
+SIMILAR_POSTS_MIN_SCORE = 0.05
+
+# 16 полос по 4 значения: пары со сходством 0.8 попадают в общую
+# корзину с вероятностью 0.9998.
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+MINHASH_SHINGLE_SIZE = 3
+MINHASH_SEED = 1
+DUPLICATE_THRESHOLD = 0.8
+DUPLICATE_MIN_WORDS = 8
+
+VIEWS_FLUSH_INTERVAL = 30
+VIEWS_FLUSH_EVERY = 500
+
+LIKES_FLUSH_INTERVAL = 10
+LIKES_FLUSH_EVERY = 100
+
+API_PAGE_SIZE = 20
+
+# Счётчик новых постов в ленте подписок: потолок, время жизни в кэше и
+# период опроса из шапки.
+FEED_UNREAD_MAX = 99
+FEED_UNREAD_TIMEOUT = 10 * 60
+FEED_POLL_SECONDS = 60
+
+TASKS_PERIODIC = {
+    'core.purge_tasks': 24 * 60 * 60,
+    'posts.send_digests': NOTIFICATION_DIGEST_INTERVAL,
+    'posts.refresh_suggestions': SUGGESTIONS_INTERVAL,
+    'posts.fold_trending': TRENDING_FOLD_INTERVAL,
+    'posts.update_similar': SIMILAR_POSTS_UPDATE_INTERVAL,
+    'posts.rebuild_similar': SIMILAR_POSTS_REBUILD_INTERVAL,
+}